@@ -5,12 +5,30 @@ Agent发现服务 - 智能路由和能力匹配
 
 import re
 import json
-from typing import Dict, List, Optional, Any, Tuple
+import time
+import heapq
+import bisect
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from dataclasses import dataclass
 from python_a2a import A2AClient
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
-@dataclass
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@dataclass(slots=True)
 class AgentCapability:
     """Agent能力描述"""
     agent_name: str
@@ -20,6 +38,167 @@ class AgentCapability:
     confidence_score: float = 0.0
 
 
+@dataclass(slots=True)
+class AgentProfile:
+    """agent的预处理匹配信息（小写名称/描述、描述词集合、技能文本中出现的技能词位掩码、购买流程角色）"""
+    name: str
+    description: str
+    description_tokens: frozenset
+    skill_mask: int
+    workflow_role: Optional[str] = None
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _classify_workflow_role(name: str, description: str) -> Optional[str]:
+    """根据小写的名称/描述判断agent在购买流程中的角色"""
+    if "coordinator" in name or "user" in name:
+        return "user_agent"
+    if "alipay" in name or "payment" in name:
+        return "payment_agent"
+    if "merchant" in name or "merchant" in description:
+        return "merchant_agent"
+    if "amazon" in name and "shopping" in name:
+        return "amazon_agent"
+    return None
+
+
+@lru_cache(maxsize=256)
+def _keyword_tokens(text: str) -> frozenset:
+    """提取用于描述匹配的关键词集合（小写、长度大于2）"""
+    return frozenset(word for word in _WORD_RE.findall(text.lower()) if len(word) > 2)
+
+
+_REGEX_META_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def _trie_regex(words: List[str]) -> str:
+    """将关键词列表压缩为共享前缀的trie正则，同一位置总是优先匹配最长的词"""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+
+class _KeywordScanner:
+    """多关键词扫描器 - 一次线性扫描找出文本中出现的全部关键词
+    
+    安装了pyahocorasick时使用Aho-Corasick自动机，否则回退到trie正则。
+    输入文本需预先转为小写。
+    """
+    
+    def __init__(self, keywords):
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword})
+        self._automaton = None
+        self._regex = None
+        
+        if not self.keywords:
+            return
+        
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            # 同一位置正则只会报告最长的词，因此每个词还要带上它所包含的其他关键词
+            self._contained = {
+                keyword: frozenset(other for other in self.keywords if other in keyword)
+                for keyword in self.keywords
+            }
+            self._regex = re.compile(f"(?=({_trie_regex(self.keywords)}))")
+    
+    def find(self, text: str) -> set:
+        """返回text中出现的所有关键词"""
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text)}
+        
+        found = set()
+        if self._regex is not None:
+            contained = self._contained
+            for match in self._regex.finditer(text):
+                found |= contained[match.group(1)]
+        return found
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, frozenset]]:
+        """逐个返回 (起始位置, 该处命中的关键词集合)"""
+        if self._automaton is not None:
+            for end_index, keyword in self._automaton.iter(text):
+                yield end_index - len(keyword) + 1, frozenset((keyword,))
+        elif self._regex is not None:
+            contained = self._contained
+            for match in self._regex.finditer(text):
+                yield match.start(), contained[match.group(1)]
+
+
+def _build_intent_scanner(intent_patterns: Dict[str, Dict[str, List[str]]]) -> Tuple[_KeywordScanner, Dict[str, frozenset], Dict[str, re.Pattern]]:
+    """将所有意图融合为一次扫描
+    
+    关键词以及形如 ``.*支付.*`` 的字面量模式都归并为"原子词"，由一个多关键词扫描器一次找出；
+    其余无法归并的正则模式按意图保留为残余正则。
+    """
+    atom_intents: Dict[str, set] = {}
+    residual_patterns: Dict[str, List[str]] = {}
+    
+    for intent, config in intent_patterns.items():
+        for keyword in config["keywords"]:
+            atom_intents.setdefault(keyword.lower(), set()).add(intent)
+        for pattern in config["patterns"]:
+            # search语义下首尾的 .* 是冗余的
+            core = pattern
+            while core.startswith(".*"):
+                core = core[2:]
+            while core.endswith(".*"):
+                core = core[:-2]
+            if core and not _REGEX_META_CHARS.intersection(core):
+                atom_intents.setdefault(core.lower(), set()).add(intent)
+            else:
+                residual_patterns.setdefault(intent, []).append(pattern)
+    
+    residual_regexes = {
+        intent: re.compile("|".join(patterns), re.IGNORECASE)
+        for intent, patterns in residual_patterns.items()
+    }
+    return (
+        _KeywordScanner(atom_intents),
+        {atom: frozenset(intents) for atom, intents in atom_intents.items()},
+        residual_regexes,
+    )
+
+
+def _build_intent_rules(capability_mapping: Dict[str, Dict[str, List[str]]]) -> Tuple[Dict[str, int], Dict[str, Tuple[Tuple[str, ...], int, int]]]:
+    """为技能词表分配位，并把每个意图的规则预计算为 (名称偏好, 主要技能位掩码, 次要技能位掩码)"""
+    vocabulary = sorted({
+        skill
+        for config in capability_mapping.values()
+        for skill in config["primary_skills"] + config["secondary_skills"]
+    })
+    skill_bits = {skill: 1 << index for index, skill in enumerate(vocabulary)}
+    
+    intent_rules = {}
+    for intent, config in capability_mapping.items():
+        primary_mask = 0
+        for skill in config["primary_skills"]:
+            primary_mask |= skill_bits[skill]
+        secondary_mask = 0
+        for skill in config["secondary_skills"]:
+            secondary_mask |= skill_bits[skill]
+        intent_rules[intent] = (tuple(config["agent_preferences"]), primary_mask, secondary_mask)
+    return skill_bits, intent_rules
+
+
 class IntentClassifier:
     """用户意图分类器"""
     
@@ -73,22 +252,54 @@ class IntentClassifier:
         }
     }
     
+    # 类加载时预编译，所有意图共用一次扫描
+    _ATOM_SCANNER, _ATOM_INTENTS, _RESIDUAL_REGEXES = _build_intent_scanner(INTENT_PATTERNS)
+    
     @classmethod
     def classify_intent(cls, user_input: str) -> List[str]:
         """分类用户意图"""
-        user_input_lower = user_input.lower()
-        detected_intents = []
+        atom_intents = cls._ATOM_INTENTS
+        found = set()
+        for atom in cls._ATOM_SCANNER.find(user_input.lower()):
+            found |= atom_intents[atom]
         
-        for intent, config in cls.INTENT_PATTERNS.items():
-            # 检查关键词
-            keyword_match = any(keyword in user_input_lower for keyword in config["keywords"])
-            
-            # 检查正则模式
-            pattern_match = any(re.search(pattern, user_input_lower) for pattern in config["patterns"])
-            
-            if keyword_match or pattern_match:
-                detected_intents.append(intent)
+        for intent, regex in cls._RESIDUAL_REGEXES.items():
+            if intent not in found and regex.search(user_input):
+                found.add(intent)
         
+        return cls._ordered_intents(found)
+    
+    @classmethod
+    def classify_many(cls, user_inputs: List[str]) -> List[List[str]]:
+        """批量分类用户意图，所有输入拼接后只做一次关键词扫描，结果与输入一一对应"""
+        lowered = [user_input.lower() for user_input in user_inputs]
+        # 记录分隔符不会出现在任何关键词中，因此命中不会跨越两个输入
+        joined = "\x1e".join(lowered)
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+        
+        atom_intents = cls._ATOM_INTENTS
+        found_per_input = [set() for _ in user_inputs]
+        for position, atoms in cls._ATOM_SCANNER.iter_matches(joined):
+            found = found_per_input[bisect.bisect_right(starts, position) - 1]
+            for atom in atoms:
+                found |= atom_intents[atom]
+        
+        # 残余正则可能跨越分隔符匹配，需逐个输入检查
+        for user_input, found in zip(user_inputs, found_per_input):
+            for intent, regex in cls._RESIDUAL_REGEXES.items():
+                if intent not in found and regex.search(user_input):
+                    found.add(intent)
+        
+        return [cls._ordered_intents(found) for found in found_per_input]
+    
+    @classmethod
+    def _ordered_intents(cls, found: set) -> List[str]:
+        """保持INTENT_PATTERNS中的意图顺序，未检测到意图时返回general"""
+        detected_intents = [intent for intent in cls.INTENT_PATTERNS if intent in found]
         return detected_intents if detected_intents else ["general"]
 
 
@@ -124,59 +335,77 @@ class AgentMatcher:
         }
     }
     
+    # 技能词表的位分配及扫描器，每个技能文本只需扫描一次
+    _SKILL_BITS, _INTENT_RULES = _build_intent_rules(CAPABILITY_MAPPING)
+    _NO_RULES: Tuple[Tuple[str, ...], int, int] = ((), 0, 0)
+    _SKILL_SCANNER = _KeywordScanner(_SKILL_BITS)
+    
+    @classmethod
+    def build_profile(cls, agent_info: Dict[str, Any]) -> AgentProfile:
+        """预处理agent信息，同一agent列表可在多次打分中复用"""
+        # 一次扫描找出所有技能名称/描述中出现的技能词，合并为位掩码
+        skill_bits = cls._SKILL_BITS
+        skill_mask = 0
+        for skill in agent_info.get("skills", []):
+            skill_text = skill.get("name", "").lower() + "\n" + skill.get("description", "").lower()
+            for token in cls._SKILL_SCANNER.find(skill_text):
+                skill_mask |= skill_bits[token]
+        
+        name = agent_info.get("name", "").lower()
+        description = agent_info.get("description", "").lower()
+        return AgentProfile(
+            name=name,
+            description=description,
+            description_tokens=_keyword_tokens(description),
+            skill_mask=skill_mask,
+            workflow_role=_classify_workflow_role(name, description)
+        )
+    
     @classmethod
-    def calculate_agent_score(cls, agent_info: Dict[str, Any], intents: List[str], user_input: str) -> float:
+    def calculate_agent_score(cls, agent_info: Dict[str, Any], intents: List[str], user_input: str,
+                              profile: Optional[AgentProfile] = None) -> float:
         """计算agent与用户需求的匹配分数"""
         total_score = 0.0
         max_possible_score = 0.0
         
-        agent_name = agent_info.get("name", "").lower()
-        agent_description = agent_info.get("description", "").lower()
-        agent_skills = agent_info.get("skills", [])
+        if profile is None:
+            profile = cls.build_profile(agent_info)
+        agent_name = profile.name
+        skill_mask = profile.skill_mask
+        
+        # 描述匹配与意图无关，只计算一次 (10分)
+        description_score = 0.0
+        matching_keywords = len(_keyword_tokens(user_input) & profile.description_tokens)
+        if matching_keywords > 0:
+            description_score = min(10.0, matching_keywords * 2)
+        
+        intent_rules = cls._INTENT_RULES
+        no_rules = cls._NO_RULES
         
         # 为每个意图计算分数
         for intent in intents:
-            intent_config = cls.CAPABILITY_MAPPING.get(intent, {})
+            preferences, primary_mask, secondary_mask = intent_rules.get(intent, no_rules)
             intent_score = 0.0
             intent_max_score = 100.0  # 每个意图的最大分数
             
             # 1. 检查agent名称匹配 (30分)
             name_score = 0.0
-            for pref in intent_config.get("agent_preferences", []):
+            for pref in preferences:
                 if pref in agent_name:
                     name_score = 30.0
                     break
             
             # 2. 检查主要技能匹配 (40分)
             primary_skill_score = 0.0
-            for skill in agent_skills:
-                skill_name = skill.get("name", "").lower()
-                skill_desc = skill.get("description", "").lower()
-                
-                for primary_skill in intent_config.get("primary_skills", []):
-                    if primary_skill in skill_name or primary_skill in skill_desc:
-                        primary_skill_score = max(primary_skill_score, 40.0)
-                        break
+            if skill_mask & primary_mask:
+                primary_skill_score = 40.0
             
             # 3. 检查次要技能匹配 (20分)
             secondary_skill_score = 0.0
-            for skill in agent_skills:
-                skill_name = skill.get("name", "").lower()
-                skill_desc = skill.get("description", "").lower()
-                
-                for secondary_skill in intent_config.get("secondary_skills", []):
-                    if secondary_skill in skill_name or secondary_skill in skill_desc:
-                        secondary_skill_score = max(secondary_skill_score, 20.0)
-                        break
-            
-            # 4. 检查描述匹配 (10分)
-            description_score = 0.0
-            user_keywords = user_input.lower().split()
-            matching_keywords = sum(1 for keyword in user_keywords 
-                                  if len(keyword) > 2 and keyword in agent_description)
-            if matching_keywords > 0:
-                description_score = min(10.0, matching_keywords * 2)
+            if skill_mask & secondary_mask:
+                secondary_skill_score = 20.0
             
+            # 4. 描述匹配分数已在循环外计算
             intent_score = name_score + primary_skill_score + secondary_skill_score + description_score
             total_score += intent_score
             max_possible_score += intent_max_score
@@ -187,67 +416,127 @@ class AgentMatcher:
         return 0.0
     
     @classmethod
-    def rank_agents(cls, agents: List[Dict[str, Any]], intents: List[str], user_input: str) -> List[Dict[str, Any]]:
-        """对agents按匹配度排序"""
-        scored_agents = []
+    def rank_agents(cls, agents: List[Dict[str, Any]], intents: List[str], user_input: str,
+                    profiles: Optional[List[AgentProfile]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """对agents按匹配度排序，profiles为与agents一一对应的预处理信息，limit限制返回前N个
+        
+        返回的字典是新对象，但skills等嵌套列表与输入共享引用，调用方不应原地修改。
+        """
+        return [
+            {**agent, "match_score": score, "matched_intents": intents}
+            for score, agent, _profile in cls._rank_scored(agents, intents, user_input, profiles, limit)
+        ]
+    
+    @classmethod
+    def _rank_scored(cls, agents: List[Dict[str, Any]], intents: List[str], user_input: str,
+                     profiles: Optional[List[AgentProfile]] = None,
+                     limit: Optional[int] = None) -> List[Tuple[float, Dict[str, Any], AgentProfile]]:
+        """按匹配度降序返回 (分数, agent, profile) 元组，打分阶段不复制agent字典"""
+        if profiles is None:
+            profiles = map(cls.build_profile, agents)
         
-        for agent in agents:
-            score = cls.calculate_agent_score(agent, intents, user_input)
-            agent_copy = agent.copy()
-            agent_copy["match_score"] = score
-            agent_copy["matched_intents"] = intents
-            scored_agents.append(agent_copy)
+        scored = ((cls.calculate_agent_score(agent, intents, user_input, profile), agent, profile)
+                  for agent, profile in zip(agents, profiles))
         
-        # 按分数降序排序
-        scored_agents.sort(key=lambda x: x["match_score"], reverse=True)
-        return scored_agents
+        # 按分数降序排序；只需要前N个时用堆选择，避免全量排序
+        if limit is None:
+            return sorted(scored, key=lambda x: x[0], reverse=True)
+        return heapq.nlargest(limit, scored, key=lambda x: x[0])
 
 
 class AgentDiscoveryService:
     """Agent发现服务核心类"""
     
-    def __init__(self, registry_url: str = "http://localhost:5001"):
+    # 发现结果LRU缓存的容量
+    DISCOVERY_CACHE_SIZE = 256
+    
+    def __init__(self, registry_url: str = "http://localhost:5001", cache_ttl: float = 5.0):
         self.registry_url = registry_url
         self.intent_classifier = IntentClassifier()
         self.agent_matcher = AgentMatcher()
+        
+        # 活跃agents列表的TTL缓存，注册中心的变化周期远大于单次请求
+        self.cache_ttl = cache_ttl
+        self._cache_lock = threading.Lock()
+        self._active_agents_cache: Tuple[float, Optional[List[Dict[str, Any]]], List[AgentProfile]] = (0.0, None, [])
+        # 每次刷新活跃agents缓存时递增，作为发现结果缓存键的一部分
+        self._active_agents_epoch = 0
+        self._discovery_cache: "OrderedDict[Tuple[str, int], Tuple[Dict[str, Any], Tuple[Optional[str], ...]]]" = OrderedDict()
+        
+        # 每个URL复用一个A2AClient
+        self._clients: Dict[str, A2AClient] = {}
+        self._clients_lock = threading.Lock()
+    
+    def invalidate(self):
+        """使活跃agents缓存失效，下次请求将重新从注册中心获取"""
+        with self._cache_lock:
+            self._active_agents_cache = (0.0, None, [])
+            self._active_agents_epoch += 1
+            self._discovery_cache.clear()
     
     def discover_agents_for_request(self, user_input: str) -> Dict[str, Any]:
-        """为用户请求发现合适的agents"""
+        """为用户请求发现合适的agents
+        
+        同一批活跃agents下相同输入的结果会被缓存；返回的字典是浅拷贝，内部列表与缓存共享，调用方不应修改。
+        """
+        return dict(self._discover(user_input)[0])
+    
+    def _discover(self, user_input: str) -> Tuple[Dict[str, Any], Tuple[Optional[str], ...]]:
+        """返回发现结果，以及与 matching_agents 一一对应的工作流角色（角色不出现在公开结果中）"""
         try:
+            # 从注册中心获取活跃的agents，相同输入在同一批agents下直接复用结果
+            active_agents, profiles, epoch = self._get_active_agents_snapshot()
+            cache_key = (user_input, epoch)
+            with self._cache_lock:
+                cached = self._discovery_cache.get(cache_key)
+                if cached is not None:
+                    self._discovery_cache.move_to_end(cache_key)
+                    return cached
+            
             # 1. 分类用户意图
             intents = self.intent_classifier.classify_intent(user_input)
             print(f"🧠 检测到的意图: {intents}")
             
-            # 2. 从注册中心获取活跃的agents
-            active_agents = self._get_active_agents()
+            # 2. 检查活跃的agents
             if not active_agents:
                 return {
                     "success": False,
                     "error": "没有可用的活跃agents",
                     "intents": intents
-                }
+                }, ()
             
             # 3. 对agents进行匹配和排序
-            ranked_agents = self.agent_matcher.rank_agents(active_agents, intents, user_input)
+            ranked = self.agent_matcher._rank_scored(active_agents, intents, user_input, profiles, limit=5)
             
             # 4. 过滤低分数的agents
-            filtered_agents = [agent for agent in ranked_agents if agent["match_score"] > 0.1]
+            ranked = [entry for entry in ranked if entry[0] > 0.1]
+            filtered_agents = [
+                {**agent, "match_score": score, "matched_intents": intents}
+                for score, agent, _profile in ranked
+            ]
+            roles = tuple(profile.workflow_role for _score, _agent, profile in ranked)
             
-            return {
+            result = {
                 "success": True,
                 "intents": intents,
                 "total_agents_found": len(active_agents),
-                "matching_agents": filtered_agents[:5],  # 返回前5个最匹配的
+                "matching_agents": filtered_agents,  # 返回前5个最匹配的
                 "recommendation": self._generate_recommendation(filtered_agents, intents, user_input)
             }
             
+            with self._cache_lock:
+                self._discovery_cache[cache_key] = (result, roles)
+                while len(self._discovery_cache) > self.DISCOVERY_CACHE_SIZE:
+                    self._discovery_cache.popitem(last=False)
+            return result, roles
+            
         except Exception as e:
             print(f"❌ Agent发现失败: {e}")
             return {
                 "success": False,
                 "error": str(e),
                 "intents": []
-            }
+            }, ()
     
     def find_agent_for_capability(self, capability: str) -> Optional[Dict[str, Any]]:
         """为特定能力查找最佳agent"""
@@ -266,8 +555,9 @@ class AgentDiscoveryService:
     def get_purchase_workflow_agents(self, user_input: str) -> Dict[str, Any]:
         """获取购买流程的agent工作流"""
         try:
-            # 发现所有相关agents
-            discovery_result = self.discover_agents_for_request(user_input)
+            # 发现所有相关agents（连同每个agent预先分类的工作流角色）
+            discovery_result, roles = self._discover(user_input)
+            discovery_result = dict(discovery_result)
             
             if not discovery_result["success"]:
                 return discovery_result
@@ -282,19 +572,10 @@ class AgentDiscoveryService:
                 "amazon_agent": None
             }
             
-            # 查找各类型的agent
-            for agent in agents:
-                agent_name = agent["name"].lower()
-                agent_desc = agent.get("description", "").lower()
-                
-                if "coordinator" in agent_name or "user" in agent_name:
-                    workflow["user_agent"] = agent
-                elif "alipay" in agent_name or "payment" in agent_name:
-                    workflow["payment_agent"] = agent
-                elif "merchant" in agent_name or "merchant" in agent_desc:
-                    workflow["merchant_agent"] = agent
-                elif "amazon" in agent_name and "shopping" in agent_name:
-                    workflow["amazon_agent"] = agent
+            # 按预先分类的角色填充工作流，每个角色取匹配度最高的agent
+            for agent, role in zip(agents, roles):
+                if role and workflow[role] is None:
+                    workflow[role] = agent
             
             # 确定执行顺序：如果有商家agent，使用新的流程；否则使用旧的Amazon流程
             if workflow["merchant_agent"]:
@@ -317,20 +598,51 @@ class AgentDiscoveryService:
             }
     
     def _get_active_agents(self) -> List[Dict[str, Any]]:
-        """从注册中心获取活跃的agents"""
+        """获取活跃的agents（在TTL内复用缓存结果）"""
+        return self._get_active_agents_snapshot()[0]
+    
+    def _get_active_agents_snapshot(self) -> Tuple[List[Dict[str, Any]], List[AgentProfile], int]:
+        """获取活跃的agents、对应的预处理信息及缓存版本号，三者随缓存一起刷新"""
+        with self._cache_lock:
+            cached_at, cached_agents, cached_profiles = self._active_agents_cache
+            if cached_agents is not None and time.monotonic() - cached_at < self.cache_ttl:
+                return cached_agents, cached_profiles, self._active_agents_epoch
+        
+        agents = self._fetch_active_agents()
+        if agents is None:
+            return [], [], -1
+        
+        profiles = [self.agent_matcher.build_profile(agent) for agent in agents]
+        with self._cache_lock:
+            self._active_agents_cache = (time.monotonic(), agents, profiles)
+            self._active_agents_epoch += 1
+            self._discovery_cache.clear()
+            return agents, profiles, self._active_agents_epoch
+    
+    def _client_for(self, url: str) -> A2AClient:
+        """获取指定URL的复用客户端"""
+        with self._clients_lock:
+            client = self._clients.get(url)
+            if client is None:
+                client = A2AClient(url)
+                self._clients[url] = client
+            return client
+    
+    def _fetch_active_agents(self) -> Optional[List[Dict[str, Any]]]:
+        """从注册中心获取活跃的agents，失败时返回None（不写入缓存）"""
         try:
-            client = A2AClient(self.registry_url)
+            client = self._client_for(self.registry_url)
             response = client.ask("list_active_agents")
             
             if response:
-                data = json.loads(response)
+                data = _json_loads(response)
                 return data.get("active_agents", [])
             
-            return []
+            return None
             
         except Exception as e:
             print(f"❌ 获取活跃agents失败: {e}")
-            return []
+            return None
     
     def _generate_recommendation(self, agents: List[Dict[str, Any]], intents: List[str], user_input: str) -> str:
         """生成推荐说明"""
@@ -353,22 +665,33 @@ class AgentDiscoveryService:
 
 
 # 便捷函数
+_SERVICES: Dict[str, AgentDiscoveryService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def _get_service(registry_url: str) -> AgentDiscoveryService:
+    """按注册中心URL复用发现服务，保留其中的缓存状态"""
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(registry_url)
+        if service is None:
+            service = AgentDiscoveryService(registry_url)
+            _SERVICES[registry_url] = service
+        return service
+
+
 def discover_agents(user_input: str, registry_url: str = "http://localhost:5001") -> Dict[str, Any]:
     """便捷的agent发现函数"""
-    service = AgentDiscoveryService(registry_url)
-    return service.discover_agents_for_request(user_input)
+    return _get_service(registry_url).discover_agents_for_request(user_input)
 
 
 def find_best_agent(capability: str, registry_url: str = "http://localhost:5001") -> Optional[Dict[str, Any]]:
     """查找最佳agent的便捷函数"""
-    service = AgentDiscoveryService(registry_url)
-    return service.find_agent_for_capability(capability)
+    return _get_service(registry_url).find_agent_for_capability(capability)
 
 
 def get_purchase_agents(user_input: str, registry_url: str = "http://localhost:5001") -> Dict[str, Any]:
     """获取购买流程agents的便捷函数"""
-    service = AgentDiscoveryService(registry_url)
-    return service.get_purchase_workflow_agents(user_input)
+    return _get_service(registry_url).get_purchase_workflow_agents(user_input)
 
 
 if __name__ == "__main__":
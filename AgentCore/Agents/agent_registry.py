@@ -7,14 +7,23 @@ import os
 import json
 import time
 import threading
-import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict, field
 from python_a2a import A2AServer, run_server, AgentCard, AgentSkill, TaskStatus, TaskState, A2AClient
 
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
 
-@dataclass
+@dataclass(slots=True)
 class RegisteredAgent:
     """注册的Agent信息"""
     agent_card: AgentCard
@@ -23,6 +32,24 @@ class RegisteredAgent:
     response_time: float = 0.0
     error_count: int = 0
     
+    # 预先转为小写的检索文本，注册时生成（重新注册会创建新实例）
+    lc_skill_pairs: List[Tuple[str, str]] = field(init=False, repr=False, compare=False)
+    lc_search_blob: str = field(init=False, repr=False, compare=False)
+    # 最近一次心跳的单调时钟时间，供超时扫描做浮点比较；对外通过 last_seen 换算为墙钟时间
+    _last_seen_mono: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._last_seen_mono = time.monotonic()
+        skills = self.agent_card.skills or []
+        self.lc_skill_pairs = [(skill.name.lower(), skill.description.lower()) for skill in skills]
+        self.lc_search_blob = (self.agent_card.description + " " +
+                               " ".join([skill.name + " " + skill.description for skill in skills])).lower()
+    
+    @property
+    def last_seen(self) -> datetime:
+        """最近一次心跳的墙钟时间"""
+        return datetime.now() - timedelta(seconds=time.monotonic() - self._last_seen_mono)
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
         return {
@@ -49,6 +76,21 @@ class AgentRegistry:
         self.lock = threading.RLock()
         self.running = False
         self.heartbeat_thread = None
+        # 执行阻塞ping的常驻线程池；超时的ping不会拖住整轮检查
+        self._ping_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="registry-ping")
+        # agent URL -> 最近一次提交的ping（仅心跳线程读写）
+        self._inflight_pings: Dict[str, Future] = {}
+        # 每个agent URL复用一个A2AClient
+        self._clients: Dict[str, A2AClient] = {}
+        self._clients_lock = threading.Lock()
+        
+        # agents的只读快照，结构变化（注册/注销）时在写锁内整体替换；
+        # 读操作直接取快照遍历，无需加锁。心跳等字段更新直接作用于快照中共享的对象
+        self._snapshot: Tuple[RegisteredAgent, ...] = ()
+        
+        # 序列化后的响应缓存，键为命令；注册/注销、心跳和健康检查更新agent时整体清空。
+        # 读写都在锁内进行
+        self._json_cache: Dict[str, str] = {}
         
         # 预注册已知的agent
         self._preregister_known_agents()
@@ -117,6 +159,8 @@ class AgentRegistry:
             
             self.agents[agent_info["url"]] = registered_agent
             print(f"📝 预注册Agent: {agent_info['name']} at {agent_info['url']}")
+        
+        self._rebuild_snapshot()
     
     def register_agent(self, agent_card: AgentCard) -> bool:
         """注册新的agent"""
@@ -129,6 +173,7 @@ class AgentRegistry:
                 )
                 
                 self.agents[agent_card.url] = registered_agent
+                self._rebuild_snapshot()
                 print(f"✅ Agent注册成功: {agent_card.name} at {agent_card.url}")
                 return True
                 
@@ -142,6 +187,9 @@ class AgentRegistry:
             if agent_url in self.agents:
                 agent_name = self.agents[agent_url].agent_card.name
                 del self.agents[agent_url]
+                self._rebuild_snapshot()
+                with self._clients_lock:
+                    self._clients.pop(agent_url, None)
                 print(f"🗑️ Agent注销成功: {agent_name}")
                 return True
             return False
@@ -150,62 +198,90 @@ class AgentRegistry:
         """更新agent心跳"""
         with self.lock:
             if agent_url in self.agents:
-                self.agents[agent_url].last_heartbeat = datetime.now()
-                self.agents[agent_url].response_time = response_time
-                self.agents[agent_url].status = "active"
-                self.agents[agent_url].error_count = 0
+                agent = self.agents[agent_url]
+                agent.last_heartbeat = datetime.now()
+                agent._last_seen_mono = time.monotonic()
+                agent.response_time = response_time
+                agent.status = "active"
+                agent.error_count = 0
+                self._invalidate_cache()
                 return True
             return False
     
+    def _rebuild_snapshot(self):
+        """agents结构变化后重建只读快照（调用方需持有锁）"""
+        self._snapshot = tuple(self.agents.values())
+        self._invalidate_cache()
+    
+    def _invalidate_cache(self):
+        """agents发生变化时丢弃序列化缓存（调用方需持有锁）"""
+        self._json_cache.clear()
+    
+    def _cached_json(self, command: str, build) -> str:
+        """返回命令的序列化响应，未命中时生成；在锁内进行，不会与失效操作交错"""
+        with self.lock:
+            cached = self._json_cache.get(command)
+            if cached is None:
+                cached = _dumps(build())
+                self._json_cache[command] = cached
+            return cached
+    
     def get_all_agents(self) -> List[Dict[str, Any]]:
         """获取所有注册的agent"""
-        with self.lock:
-            return [agent.to_dict() for agent in self.agents.values()]
+        return [agent.to_dict() for agent in self._snapshot]
     
     def get_active_agents(self) -> List[Dict[str, Any]]:
         """获取所有活跃的agent"""
-        with self.lock:
-            return [agent.to_dict() for agent in self.agents.values() 
-                   if agent.status == "active"]
+        return [agent.to_dict() for agent in self._snapshot 
+               if agent.status == "active"]
+    
+    def get_all_agents_json(self) -> str:
+        """获取所有agent列表的JSON响应，agents未变化时直接返回缓存"""
+        return self._cached_json("list_all_agents", lambda: {
+            "agents": [agent.to_dict() for agent in self._snapshot]
+        })
+    
+    def get_active_agents_json(self) -> str:
+        """获取活跃agent列表的JSON响应，agents未变化时直接返回缓存"""
+        return self._cached_json("list_active_agents", lambda: {
+            "active_agents": [agent.to_dict() for agent in self._snapshot
+                              if agent.status == "active"]
+        })
     
     def find_agents_by_skill(self, skill_name: str) -> List[Dict[str, Any]]:
         """根据技能查找agent"""
-        with self.lock:
-            matching_agents = []
-            for agent in self.agents.values():
-                if agent.status == "active" and agent.agent_card.skills:
-                    for skill in agent.agent_card.skills:
-                        if skill_name.lower() in skill.name.lower() or skill_name.lower() in skill.description.lower():
-                            matching_agents.append(agent.to_dict())
-                            break
-            return matching_agents
+        skill_name = skill_name.lower()
+        matching_agents = []
+        for agent in self._snapshot:
+            if agent.status == "active":
+                for lc_name, lc_desc in agent.lc_skill_pairs:
+                    if skill_name in lc_name or skill_name in lc_desc:
+                        matching_agents.append(agent.to_dict())
+                        break
+        return matching_agents
     
     def find_agents_by_capability(self, capability_description: str) -> List[Dict[str, Any]]:
         """根据能力描述查找agent"""
-        with self.lock:
-            matching_agents = []
-            keywords = capability_description.lower().split()
-            
-            for agent in self.agents.values():
-                if agent.status != "active":
-                    continue
-                    
-                # 检查agent描述
-                agent_text = (agent.agent_card.description + " " + 
-                             " ".join([skill.name + " " + skill.description 
-                                     for skill in agent.agent_card.skills or []]))
-                agent_text = agent_text.lower()
+        matching_agents = []
+        keywords = capability_description.lower().split()
+        
+        for agent in self._snapshot:
+            if agent.status != "active":
+                continue
                 
-                # 计算匹配度
-                match_count = sum(1 for keyword in keywords if keyword in agent_text)
-                if match_count > 0:
-                    agent_dict = agent.to_dict()
-                    agent_dict["match_score"] = match_count / len(keywords)
-                    matching_agents.append(agent_dict)
+            # 检查agent描述
+            agent_text = agent.lc_search_blob
             
-            # 按匹配度排序
-            matching_agents.sort(key=lambda x: x["match_score"], reverse=True)
-            return matching_agents
+            # 计算匹配度
+            match_count = sum(1 for keyword in keywords if keyword in agent_text)
+            if match_count > 0:
+                agent_dict = agent.to_dict()
+                agent_dict["match_score"] = match_count / len(keywords)
+                matching_agents.append(agent_dict)
+        
+        # 按匹配度排序
+        matching_agents.sort(key=lambda x: x["match_score"], reverse=True)
+        return matching_agents
     
     def start_heartbeat_monitor(self):
         """启动心跳监控"""
@@ -236,38 +312,82 @@ class AgentRegistry:
     
     def _check_all_agents_health(self):
         """检查所有agent的健康状态"""
+        current_time = datetime.now()
+        check_time = time.monotonic()
+        # 从快照中找出超时的agent（单调时钟浮点比较），ping在锁外并发进行
+        deadline = check_time - self.timeout_threshold
+        stale_urls = [agent.agent_card.url for agent in self._snapshot if agent._last_seen_mono < deadline]
+        
+        if not stale_urls:
+            return
+        
+        # 尝试主动检查
+        results = self._ping_agents_concurrently(stale_urls)
+        
         with self.lock:
-            current_time = datetime.now()
-            
-            for agent_url, agent in list(self.agents.items()):
-                try:
-                    # 检查是否超时
-                    time_since_heartbeat = (current_time - agent.last_heartbeat).total_seconds()
-                    
-                    if time_since_heartbeat > self.timeout_threshold:
-                        # 尝试主动检查
-                        if self._ping_agent(agent_url):
-                            agent.last_heartbeat = current_time
-                            agent.status = "active"
-                            agent.error_count = 0
-                        else:
-                            agent.error_count += 1
-                            if agent.error_count >= 3:
-                                agent.status = "inactive"
-                                print(f"⚠️ Agent标记为不活跃: {agent.agent_card.name}")
-                            else:
-                                agent.status = "error"
-                    
-                except Exception as e:
-                    print(f"❌ 检查Agent健康状态失败 {agent_url}: {e}")
+            for agent_url, result in zip(stale_urls, results):
+                agent = self.agents.get(agent_url)
+                if agent is None:
+                    continue  # ping期间已被注销
+                
+                if isinstance(result, Exception):
+                    print(f"❌ 检查Agent健康状态失败 {agent_url}: {result}")
                     agent.error_count += 1
                     agent.status = "error"
+                elif result:
+                    agent.last_heartbeat = current_time
+                    agent._last_seen_mono = check_time
+                    agent.status = "active"
+                    agent.error_count = 0
+                else:
+                    agent.error_count += 1
+                    if agent.error_count >= 3:
+                        agent.status = "inactive"
+                        print(f"⚠️ Agent标记为不活跃: {agent.agent_card.name}")
+                    else:
+                        agent.status = "error"
+            
+            self._invalidate_cache()
+    
+    def _ping_agents_concurrently(self, agent_urls: List[str]) -> List[Any]:
+        """并发ping多个agent，整轮耗时约等于最慢的一次ping（受超时限制）"""
+        timeout = self.heartbeat_interval / 3
+        futures = []
+        for agent_url in agent_urls:
+            # 上一轮超时的ping仍在执行时继续等待它，不再重复提交，避免卡住的ping占满线程池
+            future = self._inflight_pings.get(agent_url)
+            if future is None or future.done():
+                future = self._ping_executor.submit(self._ping_agent, agent_url)
+                self._inflight_pings[agent_url] = future
+            futures.append(future)
+        
+        wait(futures, timeout=timeout)
+        
+        results: List[Any] = []
+        for agent_url, future in zip(agent_urls, futures):
+            if not future.done():
+                print(f"❌ Ping Agent超时 {agent_url}: 超过{timeout:.1f}秒")
+                results.append(False)
+            elif future.exception() is not None:
+                results.append(future.exception())
+            else:
+                results.append(future.result())
+        return results
+    
+    def _client_for(self, agent_url: str) -> A2AClient:
+        """获取指定URL的复用客户端"""
+        with self._clients_lock:
+            client = self._clients.get(agent_url)
+            if client is None:
+                client = A2AClient(agent_url)
+                self._clients[agent_url] = client
+            return client
     
     def _ping_agent(self, agent_url: str) -> bool:
         """ping指定的agent"""
         try:
             start_time = time.time()
-            client = A2AClient(agent_url)
+            client = self._client_for(agent_url)
             response = client.ask("health check")
             response_time = time.time() - start_time
             
@@ -301,24 +421,22 @@ class AgentRegistryServer(A2AServer):
                 response_text = "healthy - Agent Registry is operational"
                 
             elif "list_all_agents" in text.lower():
-                agents = self.registry.get_all_agents()
-                response_text = json.dumps({"agents": agents}, indent=2, ensure_ascii=False)
+                response_text = self.registry.get_all_agents_json()
                 
             elif "list_active_agents" in text.lower():
-                agents = self.registry.get_active_agents()
-                response_text = json.dumps({"active_agents": agents}, indent=2, ensure_ascii=False)
+                response_text = self.registry.get_active_agents_json()
                 
             elif "find_agent_for:" in text.lower():
                 # 提取能力描述
                 capability = text.lower().split("find_agent_for:")[-1].strip()
                 agents = self.registry.find_agents_by_capability(capability)
-                response_text = json.dumps({"matching_agents": agents}, indent=2, ensure_ascii=False)
+                response_text = _dumps({"matching_agents": agents})
                 
             elif "find_skill:" in text.lower():
                 # 提取技能名称
                 skill_name = text.lower().split("find_skill:")[-1].strip()
                 agents = self.registry.find_agents_by_skill(skill_name)
-                response_text = json.dumps({"agents_with_skill": agents}, indent=2, ensure_ascii=False)
+                response_text = _dumps({"agents_with_skill": agents})
                 
             else:
                 response_text = """Agent注册中心支持的命令:
@@ -5,13 +5,335 @@
 
 import os
 import json
+import time
+import base64
 import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+try:
+    from .time_utils import now_iso as _now_iso
+except ImportError:
+    from time_utils import now_iso as _now_iso
+
+logger = logging.getLogger("AmazonRealImpl")
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    from sp_api.api import Orders, Products, Catalog
+    from sp_api.base import Marketplaces
+    SP_API_AVAILABLE = True
+except ImportError:
+    SP_API_AVAILABLE = False
+
+# SP-API各区域端点
+SP_API_ENDPOINTS = {
+    'us-east-1': 'https://sellingpartnerapi-na.amazon.com',
+    'eu-west-1': 'https://sellingpartnerapi-eu.amazon.com',
+    'us-west-2': 'https://sellingpartnerapi-fe.amazon.com',
+}
+SP_API_SANDBOX_ENDPOINTS = {
+    'us-east-1': 'https://sandbox.sellingpartnerapi-na.amazon.com',
+    'eu-west-1': 'https://sandbox.sellingpartnerapi-eu.amazon.com',
+    'us-west-2': 'https://sandbox.sellingpartnerapi-fe.amazon.com',
+}
+LWA_TOKEN_URL = 'https://api.amazon.com/auth/o2/token'
+
+
+class SPAPIError(Exception):
+    """SP-API请求失败"""
+    
+    def __init__(self, code: int, message: str, headers=None):
+        super().__init__(f"HTTP {code}: {message}")
+        self.code = code
+        self.headers = headers
+
+
+class SPResponse:
+    """SP-API响应，与sp_api的ApiResponse保持相同的payload/headers接口"""
+    
+    __slots__ = ('payload', 'headers')
+    
+    def __init__(self, payload, headers):
+        self.payload = payload
+        self.headers = headers
+
+
+class AmazonSPClient:
+    """基于aiohttp的异步SP-API客户端，实现本模块用到的几个接口"""
+    
+    # HTTP会话在进程内所有客户端间共享，复用连接池与DNS缓存
+    _session: Optional["aiohttp.ClientSession"] = None
+    _session_loop = None
+    
+    # LWA访问令牌同样在进程内共享，按refresh_token区分：{refresh_token: (access_token, expires_at)}
+    _tokens: Dict[str, tuple] = {}
+    # 换取令牌的锁按refresh_token区分，并与创建它的事件循环绑定：{refresh_token: (loop, lock)}
+    _token_locks: Dict[str, tuple] = {}
+    _refresh_tasks: Dict[str, asyncio.Task] = {}
+    # 令牌在过期前多少秒刷新
+    TOKEN_REFRESH_MARGIN = 60
+    # 连接池配置：长连接复用，避免每次请求重新进行TCP/TLS握手
+    MAX_CONNECTIONS = 64
+    KEEPALIVE_TIMEOUT = 60
+    DNS_CACHE_TTL = 300
+    REQUEST_TIMEOUT = 10.0
+    CONNECT_TIMEOUT = 3.0
+    
+    def __init__(self, refresh_token: str, client_id: str, client_secret: str,
+                 region: str = 'us-east-1', is_sandbox: bool = False):
+        self.refresh_token = refresh_token
+        self.client_id = client_id
+        self.client_secret = client_secret
+        endpoints = SP_API_SANDBOX_ENDPOINTS if is_sandbox else SP_API_ENDPOINTS
+        self.endpoint = endpoints.get(region, endpoints['us-east-1'])
+    
+    @classmethod
+    def _get_session(cls) -> "aiohttp.ClientSession":
+        """获取共享的长连接会话，确保在当前事件循环中创建"""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            cls._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=cls.MAX_CONNECTIONS,
+                    limit_per_host=cls.MAX_CONNECTIONS,
+                    keepalive_timeout=cls.KEEPALIVE_TIMEOUT,
+                    ttl_dns_cache=cls.DNS_CACHE_TTL
+                ),
+                timeout=aiohttp.ClientTimeout(total=cls.REQUEST_TIMEOUT, connect=cls.CONNECT_TIMEOUT)
+            )
+            cls._session_loop = loop
+        return cls._session
+    
+    def _get_token_lock(self) -> asyncio.Lock:
+        """获取当前事件循环中该refresh_token共享的换取令牌锁（asyncio.Lock不能跨事件循环使用）"""
+        loop = asyncio.get_running_loop()
+        entry = self._token_locks.get(self.refresh_token)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Lock())
+            self._token_locks[self.refresh_token] = entry
+        return entry[1]
+    
+    async def _get_access_token(self) -> str:
+        """获取共享的LWA访问令牌，缺失或过期时换取新令牌并启动后台刷新"""
+        cached = self._tokens.get(self.refresh_token)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+        
+        async with self._get_token_lock():
+            cached = self._tokens.get(self.refresh_token)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+            
+            cached = await self._exchange_token()
+            self._tokens[self.refresh_token] = cached
+            
+            refresh_task = self._refresh_tasks.get(self.refresh_token)
+            if refresh_task is None or refresh_task.done():
+                self._refresh_tasks[self.refresh_token] = asyncio.create_task(self._refresh_token_loop())
+            return cached[0]
+    
+    async def _exchange_token(self) -> tuple:
+        """用refresh_token向LWA换取访问令牌，返回 (access_token, 需刷新的时间点)"""
+        async with self._get_session().post(LWA_TOKEN_URL, data={
+            'grant_type': 'refresh_token',
+            'refresh_token': self.refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }) as response:
+            data = _json_loads(await response.read())
+            if response.status >= 400:
+                raise SPAPIError(response.status, data.get('error_description', 'LWA令牌获取失败'))
+        
+        expires_at = time.monotonic() + data.get('expires_in', 3600) - self.TOKEN_REFRESH_MARGIN
+        return data['access_token'], expires_at
+    
+    async def _refresh_token_loop(self):
+        """后台任务：在令牌过期前提前刷新，刷新失败时交由下次请求按需换取"""
+        while True:
+            _, expires_at = self._tokens[self.refresh_token]
+            await asyncio.sleep(max(0.0, expires_at - time.monotonic()))
+            try:
+                self._tokens[self.refresh_token] = await self._exchange_token()
+            except Exception as e:
+                logger.warning(f"⚠️ LWA访问令牌后台刷新失败: {e}")
+                self._tokens.pop(self.refresh_token, None)
+                return
+    
+    async def _signed_get(self, path: str, params: Dict[str, str]) -> SPResponse:
+        """带LWA访问令牌的GET请求"""
+        headers = {'x-amz-access-token': await self._get_access_token()}
+        async with self._get_session().get(self.endpoint + path, params=params, headers=headers) as response:
+            data = _json_loads(await response.read())
+            if response.status >= 400:
+                errors = data.get('errors') if isinstance(data, dict) else None
+                message = errors[0].get('message', '') if errors else str(data)
+                raise SPAPIError(response.status, message, response.headers)
+            payload = data.get('payload', data) if isinstance(data, dict) else data
+            return SPResponse(payload, response.headers)
+    
+    async def search_catalog_items(self, keywords: str, marketplaceIds: List[str],
+                                   pageSize: int = 10, includedData: Optional[List[str]] = None) -> SPResponse:
+        params = {
+            'keywords': keywords,
+            'marketplaceIds': ','.join(marketplaceIds),
+            'pageSize': str(pageSize),
+        }
+        if includedData:
+            params['includedData'] = ','.join(includedData)
+        return await self._signed_get('/catalog/2022-04-01/items', params)
+    
+    async def get_catalog_item(self, asin: str, marketplaceIds: List[str],
+                               includedData: Optional[List[str]] = None) -> SPResponse:
+        params = {'marketplaceIds': ','.join(marketplaceIds)}
+        if includedData:
+            params['includedData'] = ','.join(includedData)
+        return await self._signed_get(f'/catalog/2022-04-01/items/{asin}', params)
+    
+    async def get_product_pricing_for_asins(self, marketplace_id: str, asins: List[str]) -> SPResponse:
+        return await self._signed_get('/products/pricing/v0/competitivePrice', {
+            'MarketplaceId': marketplace_id,
+            'Asins': ','.join(asins),
+            'ItemType': 'Asin',
+        })
+    
+    async def get_order(self, order_id: str) -> SPResponse:
+        return await self._signed_get(f'/orders/v0/orders/{order_id}', {})
+    
+    @classmethod
+    async def close(cls):
+        """停止令牌后台刷新并关闭共享的HTTP会话"""
+        for refresh_task in cls._refresh_tasks.values():
+            refresh_task.cancel()
+        cls._refresh_tasks.clear()
+        if cls._session and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+
+
+def _first_value(values: Optional[List[Dict[str, Any]]], default: str = 'Unknown') -> str:
+    """取Catalog属性列表中首个条目的value"""
+    if values:
+        return values[0].get('value', default)
+    return default
+
+
+class TTLCache:
+    """带过期时间的LRU缓存"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+    
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return entry[1]
+    
+    def set(self, key, value) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class TokenBucket:
+    """令牌桶限流器，速率可根据SP-API返回的x-amzn-RateLimit-Limit动态调整"""
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """获取一个令牌，不足时等待补充"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+    
+    def try_acquire(self) -> bool:
+        """有空闲令牌且无人排队时立即取走一个并返回True，否则不等待直接返回False"""
+        if self._lock.locked():
+            return False
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def update_rate(self, headers) -> None:
+        """根据响应头x-amzn-RateLimit-Limit更新速率"""
+        if not headers:
+            return
+        limit = headers.get('x-amzn-RateLimit-Limit')
+        if limit:
+            try:
+                rate = float(limit)
+            except ValueError:
+                return
+            if rate > 0:
+                self.rate = rate
+
 
 class RealAmazonService:
     """真实Amazon服务实现"""
     
+    # 价格接口单次最多支持的ASIN数量
+    PRICING_BATCH_SIZE = 20
+    # 同时在途的SP-API请求上限（低于SP-API突发配额）
+    MAX_CONCURRENT_CALLS = 5
+    # 各SP-API操作的默认限流配置 (每秒请求数, 突发量)，以响应头为准动态更新
+    RATE_LIMITS = {
+        'searchCatalogItems': (2.0, 2),
+        'getCatalogItem': (2.0, 2),
+        'getPricing': (0.5, 1),
+        'getOrder': (0.5, 30),
+    }
+    # 被限流(HTTP 429)时的最大尝试次数
+    MAX_THROTTLE_RETRIES = 5
+    # 缓存配置：商品元数据很少变化，价格按分钟级变化
+    CATALOG_CACHE_TTL = 86400
+    PRICING_CACHE_TTL = 60
+    SEARCH_CACHE_TTL = 300
+    CACHE_MAXSIZE = 10000
+    # 对冲请求：延迟超过滚动P95时补发一次请求，先返回者胜出
+    HEDGED_OPERATIONS = ('getPricing', 'getOrder')
+    HEDGE_WINDOW = 200
+    HEDGE_MIN_SAMPLES = 20
+    # sp_api回退实现的专用线程池大小
+    SP_API_POOL_SIZE = 32
+    
     def __init__(self):
         # Amazon SP-API配置
         self.refresh_token = os.getenv('AMAZON_SP_API_REFRESH_TOKEN', '')
@@ -21,15 +343,57 @@ class RealAmazonService:
         self.region = os.getenv('AMAZON_REGION', 'us-east-1')
         self.is_sandbox = os.getenv('AMAZON_SANDBOX', 'false').lower() == 'true'
         
+        # 限制并发并按操作限流；asyncio原语不能跨事件循环使用，在首次调用时按当前事件循环创建
+        self._loop = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        
+        # 商品/价格/搜索结果缓存，并合并同一ASIN的并发查询（合并用的future同样绑定事件循环）
+        self._catalog_cache = TTLCache(self.CACHE_MAXSIZE, self.CATALOG_CACHE_TTL)
+        self._pricing_cache = TTLCache(self.CACHE_MAXSIZE, self.PRICING_CACHE_TTL)
+        self._search_cache = TTLCache(self.CACHE_MAXSIZE, self.SEARCH_CACHE_TTL)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending_prices: Dict[str, asyncio.Future] = {}
+        self._price_flush_scheduled = False
+        # 进行中的批量价格请求任务，保留引用避免任务在执行中被垃圾回收
+        self._flush_tasks: set = set()
+        
+        # 各对冲操作最近的成功请求耗时（秒）
+        self._latencies: Dict[str, deque] = {
+            operation: deque(maxlen=self.HEDGE_WINDOW) for operation in self.HEDGED_OPERATIONS
+        }
+        
         # 初始化Amazon客户端
         self._init_amazon_client()
     
     def _init_amazon_client(self):
-        """初始化Amazon SP-API客户端"""
+        """初始化Amazon SP-API客户端，优先使用aiohttp异步客户端，否则回退到sp_api"""
+        self.orders_api = None
+        self.products_api = None
+        self.catalog_api = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        
+        # 缺少LWA凭证时客户端必然无法工作，直接跳过
+        if not (self.refresh_token and self.client_id and self.client_secret):
+            logger.warning("⚠️ 未配置Amazon SP-API凭证，跳过客户端初始化")
+            return
+        
+        if AIOHTTP_AVAILABLE:
+            client = AmazonSPClient(
+                self.refresh_token, self.client_id, self.client_secret,
+                region=self.region, is_sandbox=self.is_sandbox
+            )
+            self.orders_api = client
+            self.products_api = client
+            self.catalog_api = client
+            logger.info("✅ Amazon SP-API异步客户端初始化成功")
+            return
+        
+        if not SP_API_AVAILABLE:
+            logger.error("❌ Amazon SP-API客户端初始化失败: 未安装aiohttp或sp_api")
+            return
+        
         try:
-            from sp_api.api import Orders, Products, Catalog
-            from sp_api.base import Marketplaces
-            
             # 配置认证信息
             credentials = {
                 'refresh_token': self.refresh_token,
@@ -44,93 +408,294 @@ class RealAmazonService:
             self.orders_api = Orders(credentials=credentials, marketplace=Marketplaces.US)
             self.products_api = Products(credentials=credentials, marketplace=Marketplaces.US)
             self.catalog_api = Catalog(credentials=credentials, marketplace=Marketplaces.US)
+            # sp_api为同步客户端，其调用放到专用线程池中执行，避免阻塞事件循环
+            self._pool = ThreadPoolExecutor(max_workers=self.SP_API_POOL_SIZE, thread_name_prefix="sp-api")
             
-            print("✅ Amazon SP-API客户端初始化成功")
+            logger.info("✅ Amazon SP-API客户端初始化成功")
             
         except Exception as e:
-            print(f"❌ Amazon SP-API客户端初始化失败: {e}")
+            logger.exception(f"❌ Amazon SP-API客户端初始化失败: {e}")
             self.orders_api = None
             self.products_api = None
             self.catalog_api = None
     
+    def _bind_loop(self) -> None:
+        """事件循环变化时重建限流器并丢弃上一个事件循环中的合并请求（已学到的限流速率保留）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._sem = asyncio.Semaphore(self.MAX_CONCURRENT_CALLS)
+        self._buckets = {
+            operation: TokenBucket(self._buckets[operation].rate if operation in self._buckets else rate, burst)
+            for operation, (rate, burst) in self.RATE_LIMITS.items()
+        }
+        self._inflight = {}
+        self._pending_prices = {}
+        self._price_flush_scheduled = False
+        self._flush_tasks = set()
+    
     async def search_products(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """搜索Amazon商品（使用Catalog API）"""
+        """搜索Amazon商品（使用Catalog API），按搜索结果顺序返回商品列表"""
+        products = [product async for product in self.iter_products(query, max_results)]
+        if len(products) > 1:
+            # 逐个产出时按完成先后排列，这里恢复为搜索结果的顺序
+            rank = {item['asin']: i for i, item in enumerate(self._search_cache.get((query, max_results)) or ())}
+            products.sort(key=lambda product: rank.get(product['asin'], len(rank)))
+        return products
+    
+    async def iter_products(self, query: str, max_results: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """搜索Amazon商品（使用Catalog API），商品信息就绪即逐个产出"""
         if not self.catalog_api:
-            return []
+            return
         
+        tasks: List[asyncio.Future] = []
         try:
-            # 使用Catalog API搜索商品
-            response = self.catalog_api.search_catalog_items(
-                keywords=query,
-                marketplaceIds=[self.marketplace_id],
-                pageSize=max_results
-            )
+            items = self._search_cache.get((query, max_results))
+            if items is None:
+                # 使用Catalog API搜索商品，搜索结果直接带回所需的商品属性
+                response = await self._call(
+                    'searchCatalogItems',
+                    self.catalog_api.search_catalog_items,
+                    keywords=query,
+                    marketplaceIds=[self.marketplace_id],
+                    pageSize=max_results,
+                    includedData=['attributes', 'images', 'salesRanks']
+                )
+                
+                items = []
+                if response.payload and 'items' in response.payload:
+                    items = [item for item in response.payload['items'] if item.get('asin')]
+                self._search_cache.set((query, max_results), items)
+            if not items:
+                return
             
-            products = []
-            if response.payload and 'items' in response.payload:
-                for item in response.payload['items']:
-                    # 获取商品详细信息
-                    asin = item.get('asin')
-                    if asin:
-                        product_detail = await self._get_product_detail(asin)
-                        if product_detail:
-                            products.append(product_detail)
+            # 搜索结果未带回商品属性时，并发逐个获取详情，先完成的先产出
+            if not all('attributes' in item for item in items):
+                tasks = [asyncio.ensure_future(self._get_product_detail(item['asin'])) for item in items]
+                for next_detail in asyncio.as_completed(tasks):
+                    detail = await next_detail
+                    if detail:
+                        yield detail
+                return
             
-            return products
+            # 价格已缓存的商品直接产出，其余按批次请求价格，每批完成即产出
+            items_by_asin = {}
+            missing = []
+            for item in items:
+                asin = item['asin']
+                self._catalog_cache.set(asin, item)
+                price = self._pricing_cache.get(asin)
+                if price is None:
+                    items_by_asin[asin] = item
+                    missing.append(asin)
+                else:
+                    yield self._build_product(asin, item, price)
+            
+            tasks = [
+                asyncio.ensure_future(self._fetch_prices(missing[start:start + self.PRICING_BATCH_SIZE]))
+                for start in range(0, len(missing), self.PRICING_BATCH_SIZE)
+            ]
+            for next_prices in asyncio.as_completed(tasks):
+                prices = await next_prices
+                for asin, price in prices.items():
+                    yield self._build_product(asin, items_by_asin[asin], price)
             
         except Exception as e:
-            print(f"❌ 搜索商品失败: {e}")
-            return []
+            logger.exception(f"❌ 搜索商品失败: {e}")
+        finally:
+            # 调用方提前停止迭代或出错时，取消尚未完成的请求任务
+            for task in tasks:
+                task.cancel()
     
     async def _get_product_detail(self, asin: str) -> Optional[Dict[str, Any]]:
-        """获取商品详细信息"""
+        """获取商品详细信息，同一ASIN的并发查询只发起一次请求"""
+        self._bind_loop()
+        pending = self._inflight.get(asin)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch_product_detail(asin))
+            self._inflight[asin] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(asin, None))
+        return await asyncio.shield(pending)
+    
+    async def _fetch_product_detail(self, asin: str) -> Optional[Dict[str, Any]]:
+        """获取商品详细信息，优先使用缓存"""
         try:
-            # 获取商品信息
-            catalog_response = self.catalog_api.get_catalog_item(
-                asin=asin,
-                marketplaceIds=[self.marketplace_id],
-                includedData=['attributes', 'images', 'productTypes', 'salesRanks']
-            )
+            item = self._catalog_cache.get(asin)
+            price = self._pricing_cache.get(asin)
             
-            # 获取价格信息
-            pricing_response = self.products_api.get_product_pricing_for_asins(
-                marketplace_id=self.marketplace_id,
-                asins=[asin]
+            # 并发获取缓存未命中的商品信息和价格信息
+            catalog_task = None
+            if item is None:
+                catalog_task = self._call(
+                    'getCatalogItem',
+                    self.catalog_api.get_catalog_item,
+                    asin=asin,
+                    marketplaceIds=[self.marketplace_id],
+                    includedData=['attributes', 'images', 'productTypes', 'salesRanks']
+                )
+            pricing_task = self._get_price(asin) if price is None else None
+            catalog_response, fetched_price = await asyncio.gather(
+                catalog_task or asyncio.sleep(0),
+                pricing_task or asyncio.sleep(0)
             )
             
-            # 解析商品信息
-            item = catalog_response.payload
-            attributes = item.get('attributes', {})
+            if catalog_response is not None:
+                item = catalog_response.payload
+                self._catalog_cache.set(asin, item)
+            if fetched_price is not None:
+                price = fetched_price
             
-            # 解析价格
-            price = 0.0
-            if pricing_response.payload:
-                for pricing_item in pricing_response.payload:
-                    if pricing_item.get('ASIN') == asin:
-                        product_pricing = pricing_item.get('Product', {})
-                        competitive_pricing = product_pricing.get('CompetitivePricing', {})
-                        if competitive_pricing:
-                            price_info = competitive_pricing.get('CompetitivePrices', [])
-                            if price_info:
-                                landed_price = price_info[0].get('Price', {}).get('LandedPrice', {})
-                                if landed_price:
-                                    price = float(landed_price.get('Amount', 0))
-            
-            return {
-                'asin': asin,
-                'title': attributes.get('item_name', [{}])[0].get('value', 'Unknown'),
-                'price': price,
-                'currency': 'USD',
-                'url': f"https://www.amazon.com/dp/{asin}",
-                'images': [img.get('link') for img in item.get('images', [])],
-                'brand': attributes.get('brand', [{}])[0].get('value', 'Unknown'),
-                'availability': 'Available'  # 简化处理
-            }
+            return self._build_product(asin, item, price)
             
         except Exception as e:
-            print(f"❌ 获取商品详情失败 {asin}: {e}")
+            logger.exception(f"❌ 获取商品详情失败 {asin}: {e}")
             return None
     
+    async def _get_price(self, asin: str) -> float:
+        """获取单个ASIN的价格：同一轮事件循环内的单品查询合并为一次批量价格请求"""
+        self._bind_loop()
+        future = self._pending_prices.get(asin)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending_prices[asin] = future
+            if not self._price_flush_scheduled:
+                self._price_flush_scheduled = True
+                asyncio.get_running_loop().call_soon(self._start_price_flush)
+        return await asyncio.shield(future)
+    
+    def _start_price_flush(self):
+        """在事件循环下一轮启动批量价格请求任务，并持有其引用直至完成"""
+        task = asyncio.ensure_future(self._flush_prices())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush_prices(self):
+        """为当前积攒的单品价格查询发起批量请求并分发结果"""
+        batch, self._pending_prices = self._pending_prices, {}
+        self._price_flush_scheduled = False
+        try:
+            prices = await self._fetch_prices(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for asin, future in batch.items():
+            if not future.done():
+                future.set_result(prices[asin])
+    
+    async def _fetch_prices(self, asins: List[str]) -> Dict[str, float]:
+        """批量获取价格并写入缓存，超过PRICING_BATCH_SIZE个ASIN时分批并发请求"""
+        pricing_responses = await asyncio.gather(*(
+            self._hedged_call(
+                'getPricing',
+                self.products_api.get_product_pricing_for_asins,
+                marketplace_id=self.marketplace_id,
+                asins=asins[start:start + self.PRICING_BATCH_SIZE]
+            )
+            for start in range(0, len(asins), self.PRICING_BATCH_SIZE)
+        ))
+        
+        index: Dict[str, float] = {}
+        for pricing_response in pricing_responses:
+            for asin, price in self._index_pricing(pricing_response.payload).items():
+                index.setdefault(asin, price)
+        
+        prices = {asin: index.get(asin, 0.0) for asin in asins}
+        for asin, price in prices.items():
+            self._pricing_cache.set(asin, price)
+        return prices
+    
+    async def _call(self, operation: str, func, *args, _token_held: bool = False, **kwargs):
+        """
+        执行SP-API调用，受令牌桶限流和并发上限约束，被限流时指数退避重试；阻塞调用放到专用线程池中执行
+        
+        _token_held为True表示调用方已为首次尝试取得令牌
+        """
+        self._bind_loop()
+        bucket = self._buckets[operation]
+        for attempt in range(self.MAX_THROTTLE_RETRIES):
+            if not _token_held:
+                await bucket.acquire()
+            _token_held = False
+            try:
+                async with self._sem:
+                    if asyncio.iscoroutinefunction(func):
+                        response = await func(*args, **kwargs)
+                    else:
+                        response = await asyncio.get_running_loop().run_in_executor(
+                            self._pool, functools.partial(func, *args, **kwargs)
+                        )
+            except Exception as e:
+                if getattr(e, 'code', None) != 429 or attempt == self.MAX_THROTTLE_RETRIES - 1:
+                    raise
+                bucket.update_rate(getattr(e, 'headers', None))
+                await asyncio.sleep(2 ** attempt)
+                continue
+            bucket.update_rate(getattr(response, 'headers', None))
+            return response
+    
+    async def _hedged_call(self, operation: str, func, *args, **kwargs):
+        """
+        对长尾延迟明显的操作发起对冲请求：首个请求超过滚动P95仍未返回时补发一次，取先成功者
+        
+        对冲请求不排队等待令牌：令牌桶没有空闲令牌时（如getPricing突发量为1）补发只会排在首个请求之后，直接跳过
+        """
+        latencies = self._latencies[operation]
+        threshold = None
+        if len(latencies) >= self.HEDGE_MIN_SAMPLES:
+            threshold = sorted(latencies)[int(len(latencies) * 0.95)]
+        
+        started = time.monotonic()
+        pending = {asyncio.ensure_future(self._call(operation, func, *args, **kwargs))}
+        if threshold is not None:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if not done and self._buckets[operation].try_acquire():
+                pending.add(asyncio.ensure_future(self._call(operation, func, *args, _token_held=True, **kwargs)))
+        
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        latencies.append(time.monotonic() - started)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @staticmethod
+    def _index_pricing(payload: Optional[List[Dict[str, Any]]]) -> Dict[str, float]:
+        """一次遍历价格接口返回的条目，建立 {ASIN: 到手价} 索引（同一ASIN以首个条目为准）"""
+        index: Dict[str, float] = {}
+        for pricing_item in payload or []:
+            asin = pricing_item.get('ASIN')
+            if asin in index:
+                continue
+            price_info = pricing_item.get('Product', {}).get('CompetitivePricing', {}).get('CompetitivePrices')
+            amount = price_info[0].get('Price', {}).get('LandedPrice', {}).get('Amount') if price_info else None
+            index[asin] = float(amount or 0)
+        return index
+    
+    @staticmethod
+    def _build_product(asin: str, item: Dict[str, Any], price: float) -> Dict[str, Any]:
+        """由Catalog条目和价格构建商品信息"""
+        attributes = item.get('attributes') or {}
+        return {
+            'asin': asin,
+            'title': _first_value(attributes.get('item_name')),
+            'price': price,
+            'currency': 'USD',
+            'url': f"https://www.amazon.com/dp/{asin}",
+            'images': [img.get('link') for img in item.get('images') or ()],
+            'brand': _first_value(attributes.get('brand')),
+            'availability': 'Available'  # 简化处理
+        }
+    
     async def create_order(self, product_info: Dict[str, Any], payment_info: Dict[str, Any]) -> Dict[str, Any]:
         """创建Amazon订单"""
         # 注意：Amazon SP-API主要用于卖家，不支持买家下单
@@ -139,20 +704,8 @@ class RealAmazonService:
         
         try:
             # 生成订单号
-            order_id = f"AMZ-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            # 模拟订单创建（实际需要调用Amazon的购买API）
-            order_data = {
-                "order_id": order_id,
-                "asin": product_info.get('asin'),
-                "product_name": product_info.get('name'),
-                "quantity": product_info.get('quantity', 1),
-                "price": product_info.get('price'),
-                "payment_order_id": payment_info.get('order_number'),
-                "status": "Pending",
-                "created_at": datetime.now().isoformat(),
-                "estimated_delivery": (datetime.now() + timedelta(days=3)).isoformat()
-            }
+            now = datetime.now()
+            order_id = f"AMZ-{now.strftime('%Y%m%d%H%M%S')}"
             
             # 在真实实现中，这里需要：
             # 1. 调用Amazon的购物车API添加商品
@@ -160,9 +713,20 @@ class RealAmazonService:
             # 3. 选择配送方式
             # 4. 确认订单
             
+            # 模拟订单创建（实际需要调用Amazon的购买API）
             return {
                 "success": True,
-                "order_data": order_data,
+                "order_data": {
+                    "order_id": order_id,
+                    "asin": product_info.get('asin'),
+                    "product_name": product_info.get('name'),
+                    "quantity": product_info.get('quantity', 1),
+                    "price": product_info.get('price'),
+                    "payment_order_id": payment_info.get('order_number'),
+                    "status": "Pending",
+                    "created_at": now.isoformat(),
+                    "estimated_delivery": (now + timedelta(days=3)).isoformat()
+                },
                 "message": "订单创建成功"
             }
             
@@ -177,7 +741,7 @@ class RealAmazonService:
         try:
             # 使用Orders API查询订单
             if self.orders_api:
-                response = self.orders_api.get_order(order_id)
+                response = await self._hedged_call('getOrder', self.orders_api.get_order, order_id)
                 
                 if response.payload:
                     order = response.payload
@@ -201,6 +765,15 @@ class RealAmazonService:
                 "success": False,
                 "error": f"查询订单失败: {str(e)}"
             }
+    
+    async def close(self):
+        """释放异步客户端持有的HTTP会话及sp_api线程池"""
+        if isinstance(self.catalog_api, AmazonSPClient):
+            await self.catalog_api.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
 
 class AmazonModeManager:
     """Amazon模式管理器"""
@@ -222,16 +795,19 @@ class AmazonModeManager:
             # 使用当前的RapidAPI实现
             return []  # 这里应该调用当前的搜索实现
     
+    async def iter_products(self, query: str, max_results: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """搜索商品（根据模式选择实现），逐个产出商品"""
+        if self.mode == 'real' and self.service:
+            async for product in self.service.iter_products(query, max_results):
+                yield product
+    
     async def create_order(self, product_info: Dict[str, Any], payment_info: Dict[str, Any]) -> Dict[str, Any]:
         """创建订单（根据模式选择实现）"""
         if self.mode == 'real' and self.service:
             return await self.service.create_order(product_info, payment_info)
         else:
-            # 使用模拟实现
-            import random
-            import string
-            
-            order_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=13))
+            # 使用模拟实现：8字节随机数的base32编码恰好13位有效字符（A-Z2-7）
+            order_id = base64.b32encode(os.urandom(8))[:13].decode()
             
             return {
                 "success": True,
@@ -242,7 +818,7 @@ class AmazonModeManager:
                     "quantity": product_info.get('quantity', 1),
                     "price": product_info.get('price'),
                     "status": "Confirmed",
-                    "created_at": datetime.now().isoformat()
+                    "created_at": _now_iso()
                 },
                 "message": "模拟订单创建成功"
             }
@@ -261,6 +837,13 @@ class AmazonModeManager:
                 "estimated_delivery": (datetime.now() + timedelta(days=2)).isoformat()
             }
 
+
+@functools.lru_cache(maxsize=1)
+def get_manager() -> AmazonModeManager:
+    """获取进程内共享的AmazonModeManager，避免每次请求重复初始化SP-API客户端"""
+    return AmazonModeManager()
+
+
 # 真实Amazon API集成的挑战和解决方案
 AMAZON_INTEGRATION_NOTES = """
 Amazon真实API集成的挑战：
@@ -287,9 +870,11 @@ Amazon真实API集成的挑战：
 """
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # 示例用法
     async def test_amazon():
-        manager = AmazonModeManager()
+        manager = get_manager()
         
         # 搜索商品
         products = await manager.search_products("iPhone 15 Pro")
@@ -4,22 +4,105 @@
 """
 
 import os
+import re
 import json
 import logging
 import time
-from typing import Dict, Any, Optional, List
+import random
+import string
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from itertools import islice
+
+try:
+    from .time_utils import now_iso as _now_iso
+except ImportError:
+    from time_utils import now_iso as _now_iso
 
 # --- A2A 库导入 ---
 from python_a2a import A2AServer, run_server, AgentCard, AgentSkill, TaskStatus, TaskState, A2AClient
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _loads = orjson.loads
+    
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    ORJSON_AVAILABLE = False
+    _loads = json.loads
+    
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+
 # --- 日志配置 ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ArbitrationAgent")
 
 
+# 通知重试退避的上限（秒）
+MAX_RETRY_BACKOFF = 10.0
+
+# 裁定确认期限：24小时 = 86400秒
+CONFIRMATION_TIMEOUT_SECONDS = 24 * 60 * 60
+
+@lru_cache(maxsize=32)
+def _err(msg: str) -> str:
+    """返回失败响应的JSON字符串（常见错误信息只序列化一次）"""
+    return _dumps({"success": False, "error": msg})
+
+
+# 用于从Agent响应文本中就地解析内嵌的JSON对象
+_JSON_DECODER = json.JSONDecoder()
+
+# --- 从文本请求中提取订单ID的正则 ---
+_ORDER_RE_CN = re.compile(r'订单[号]*[:\s]*([A-Za-z0-9_-]+)', re.IGNORECASE)
+_ORDER_RE_EN = re.compile(r'order[_\s]*id[:\s]*([A-Za-z0-9_-]+)', re.IGNORECASE)
+
+
+# --- 案例ID编码 ---
+_B36_DIGITS = string.digits + string.ascii_lowercase
+
+
+def _b36(n: int) -> str:
+    """将非负整数编码为base36字符串"""
+    if n == 0:
+        return "0"
+    chars = []
+    while n:
+        n, r = divmod(n, 36)
+        chars.append(_B36_DIGITS[r])
+    return "".join(reversed(chars))
+
+
+# 上一次分配案例ID使用的纳秒时间戳（time_ns 在部分平台上分辨率较粗，需保证严格递增）
+_case_id_lock = threading.Lock()
+_last_case_ns = 0
+
+
+def _next_case_id() -> str:
+    """
+    生成进程内唯一的仲裁案例ID
+    
+    格式为 ARB_<纳秒时间戳的base36编码>，如 ARB_dddnxi4s4kk5。
+    旧格式 ARB_<秒级时间戳>_<订单号前8位> 中的订单号已不再包含在ID里，按订单查找请使用 order_id 字段
+    """
+    global _last_case_ns
+    with _case_id_lock:
+        ns = time.time_ns()
+        if ns <= _last_case_ns:
+            ns = _last_case_ns + 1
+        _last_case_ns = ns
+    return f"ARB_{_b36(ns)}"
+
+
 # ==============================================================================
 #  数据模型
 # ==============================================================================
@@ -40,7 +123,7 @@ class ArbitrationDecision(Enum):
     PARTIAL_SUPPORT = "partial_support"      # 部分支持（双方各承担部分责任）
 
 
-@dataclass
+@dataclass(slots=True)
 class ArbitrationCase:
     """仲裁案例数据模型"""
     case_id: str
@@ -49,18 +132,27 @@ class ArbitrationCase:
     merchant_agent_url: str
     dispute_description: str
     order_info: Dict[str, Any]
+    # 状态变更统一经 ArbitrationAgent._set_status 进行，以同步 status_value 与按状态索引
     status: ArbitrationStatus = ArbitrationStatus.PENDING
     decision: Optional[ArbitrationDecision] = None
     decision_reason: Optional[str] = None
     responsible_party: Optional[str] = None  # "user" or "merchant"
     user_agreed: bool = False
     merchant_agreed: bool = False
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    # 时间字段均为精确到秒的ISO字符串（由 time_utils.now_iso 生成，不含微秒）
+    created_at: str = field(default_factory=_now_iso)
     decided_at: Optional[str] = None
     executed_at: Optional[str] = None
+    # status 的字符串值，随状态变更同步更新，供构建响应时直接读取
+    status_value: str = field(init=False, repr=False, compare=False)
+    # (decided_at 原字符串, 解析后的naive datetime)，超时检查时直接做减法，无需重复解析
+    decided_at_parsed: Optional[Tuple[str, datetime]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.status_value = self.status.value
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
+        """转换为字典（枚举字段转为其值；浅拷贝：order_info 与实例共享）"""
         return {
             "case_id": self.case_id,
             "order_id": self.order_id,
@@ -68,8 +160,8 @@ class ArbitrationCase:
             "merchant_agent_url": self.merchant_agent_url,
             "dispute_description": self.dispute_description,
             "order_info": self.order_info,
-            "status": self.status.value,
-            "decision": self.decision.value if self.decision else None,
+            "status": self.status_value,
+            "decision": _ENUM_VALUES.get(self.decision),
             "decision_reason": self.decision_reason,
             "responsible_party": self.responsible_party,
             "user_agreed": self.user_agreed,
@@ -78,6 +170,122 @@ class ArbitrationCase:
             "decided_at": self.decided_at,
             "executed_at": self.executed_at
         }
+    
+    def to_bytes(self) -> bytes:
+        """序列化为JSON字节串"""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict(), ensure_ascii=False).encode()
+
+
+# 枚举成员 -> 值 的查找表，序列化时免去逐个访问 .value
+_ENUM_VALUES: Dict[Enum, str] = {
+    member: member.value
+    for enum_cls in (ArbitrationStatus, ArbitrationDecision)
+    for member in enum_cls
+}
+
+
+# 仲裁状态显示映射
+_STATUS_DISPLAY = {
+    ArbitrationStatus.PENDING.value: "待处理",
+    ArbitrationStatus.PROCESSING.value: "处理中",
+    ArbitrationStatus.DECIDED.value: "已裁定",
+    ArbitrationStatus.AGREED.value: "双方同意",
+    ArbitrationStatus.EXECUTED.value: "已执行",
+    ArbitrationStatus.ESCALATED.value: "已升级为人工仲裁"
+}
+
+# 已终结（可从内存中淘汰）的案例状态
+_TERMINAL_STATUSES = frozenset({ArbitrationStatus.EXECUTED, ArbitrationStatus.ESCALATED})
+
+# 订单状态 -> (裁定结果, 裁定原因模板, 责任方, 日志摘要)
+_SUPPORT_USER_ENTRY = (
+    ArbitrationDecision.SUPPORT_USER,
+    "订单状态为 {status}（未发货），商家未履行发货义务，支持用户退款请求。",
+    "merchant",
+    "支持用户（未发货）"
+)
+_DECISION_TABLE: Dict[str, tuple] = {
+    "PENDING": _SUPPORT_USER_ENTRY,
+    "ACCEPTED": _SUPPORT_USER_ENTRY,
+    "PROCESSING": _SUPPORT_USER_ENTRY,
+    "DELIVERED": (
+        ArbitrationDecision.PARTIAL_SUPPORT,
+        "订单已发货但用户未确认收货，需要更多信息（交付证明、用户反馈等）来判断。",
+        "both",
+        "部分支持（需要更多信息）"
+    ),
+    "COMPLETED": (
+        ArbitrationDecision.SUPPORT_MERCHANT,
+        "订单状态为 {status}（已确认收货），用户已确认收到商品，支持商家，驳回用户退款请求。",
+        "user",
+        "支持商家（已确认收货）"
+    ),
+}
+# 其他状态（如CANCELLED等）→ 需要更多信息
+_DEFAULT_DECISION = (
+    ArbitrationDecision.PARTIAL_SUPPORT,
+    "订单状态为 {status}，需要更多信息（订单详情、取消原因等）来判断。",
+    "both",
+    "部分支持（需要更多信息）"
+)
+
+
+def _extract_order_status(order_info: Any) -> str:
+    """从订单信息中提取大写的订单状态，没有状态时根据交付/接单信息推断"""
+    if not isinstance(order_info, dict):
+        return "PENDING"
+    
+    order_status = order_info.get("status", "").upper()
+    if order_status:
+        return order_status
+    
+    # 检查是否有交付信息
+    delivery_info = order_info.get("delivery_info")
+    if delivery_info and delivery_info.get("delivery_status"):
+        return "DELIVERED"
+    if order_info.get("accepted_at"):
+        return "ACCEPTED"
+    return "PENDING"
+
+
+@lru_cache(maxsize=16)
+def _resolve_status(order_status: str) -> Tuple[ArbitrationDecision, str, str, str]:
+    """根据订单状态查表得到 (裁定结果, 裁定原因, 责任方, 日志摘要)，结果只取决于状态，可直接缓存"""
+    decision, reason_template, responsible_party, summary = _DECISION_TABLE.get(order_status, _DEFAULT_DECISION)
+    return decision, reason_template.format(status=order_status), responsible_party, summary
+
+
+# 裁定结果的中文显示
+_DECISION_DISPLAY = {
+    ArbitrationDecision.SUPPORT_USER: "支持用户",
+    ArbitrationDecision.SUPPORT_MERCHANT: "支持商家",
+    ArbitrationDecision.PARTIAL_SUPPORT: "部分支持"
+}
+
+# 裁定结果通知模板（通过 format_map 填充）
+_NOTIFY_TEMPLATE = """⚖️ **仲裁裁定结果通知**
+
+**案例信息**：
+- 案例ID: {case_id}
+- 订单ID: {order_id}
+- 纠纷描述: {dispute}
+
+**裁定结果**：
+- 裁定: {decision}
+- 裁定原因: {reason}
+- 责任方: {party}
+
+**后续步骤**：
+请确认是否同意此裁定结果。双方都同意后，将执行仲裁结果。
+
+**重要提示**：
+- 如果一方不同意，可以申请升级为人工仲裁
+- 确认期限：24小时
+- 逾期未确认将视为默认同意
+
+请回复"同意"或"不同意"以确认裁定结果。"""
 
 
 # ==============================================================================
@@ -88,21 +296,42 @@ class ArbitrationAgent(A2AServer):
     仲裁 Agent - 负责处理交易纠纷和仲裁请求
     """
     
+    # 内存中保留的案例数上限，超出后淘汰最久未访问的已终结案例
+    MAX_ACTIVE_CASES = 10_000
+    
     def __init__(self, agent_card: AgentCard):
         """初始化仲裁 Agent"""
         super().__init__(agent_card=agent_card)
         
-        # 仲裁案例存储（在实际应用中应该使用数据库）
+        # 仲裁案例存储（在实际应用中应该使用数据库），按创建顺序排列
         self.cases: Dict[str, ArbitrationCase] = {}
+        # 已终结案例ID，按最近访问排序，淘汰时从最久未访问处开始（未终结的案例不参与排序）
+        self._terminal_lru: "OrderedDict[str, None]" = OrderedDict()
+        # 订单ID -> 案例ID 索引，用于O(1)查重
+        self._order_index: Dict[str, str] = {}
+        # 状态值 -> 该状态下的案例ID（dict 作为有序集合），按状态列出案例时无需扫描全部案例
+        self._by_status: Dict[str, Dict[str, None]] = {status.value: {} for status in ArbitrationStatus}
+        
+        # 通知双方Agent用的线程池（长期复用，避免每次请求创建线程）
+        self._notify_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="arbitration-notify")
+        # Agent URL -> A2AClient 缓存，重试和后续通知复用同一客户端
+        self._client_cache: Dict[str, A2AClient] = {}
+        self._client_cache_lock = threading.Lock()
         
         # 仲裁状态显示映射
-        self.STATUS_DISPLAY = {
-            ArbitrationStatus.PENDING.value: "待处理",
-            ArbitrationStatus.PROCESSING.value: "处理中",
-            ArbitrationStatus.DECIDED.value: "已裁定",
-            ArbitrationStatus.AGREED.value: "双方同意",
-            ArbitrationStatus.EXECUTED.value: "已执行",
-            ArbitrationStatus.ESCALATED.value: "已升级为人工仲裁"
+        self.STATUS_DISPLAY = _STATUS_DISPLAY
+        
+        # JSON 请求类型 -> (处理函数, 必需字段)，处理函数接收解析后的请求字典
+        self._handlers: Dict[str, tuple] = {
+            "initiate_arbitration": (self.initiate_arbitration, ()),
+            "process_dispute": (lambda d: self.process_dispute(d["case_id"]), ("case_id",)),
+            # party: "user" or "merchant"；agreed 为 True 表示同意，False 表示不同意
+            "confirm_decision": (
+                lambda d: self.confirm_decision(d["case_id"], d["party"], d.get("agreed", True)),
+                ("case_id", "party")
+            ),
+            "check_timeout": (lambda d: self.check_confirmation_timeout(d["case_id"]), ("case_id",)),
+            "execute_decision": (lambda d: self.execute_decision(d["case_id"]), ("case_id",)),
         }
         
         logger.info("✅ [ArbitrationAgent] 仲裁 Agent 初始化完成")
@@ -113,66 +342,29 @@ class ArbitrationAgent(A2AServer):
         logger.info(f"📩 [ArbitrationAgent] 收到请求: '{text[:100]}...'")
         
         try:
-            # 尝试解析 JSON 格式的请求
-            try:
-                request_data = json.loads(text)
+            # 仅当首个非空白字符是 { 或 [ 时才尝试解析 JSON，纯文本请求直接走文本解析
+            request_data = None
+            stripped = text.lstrip()
+            if stripped[:1] in ("{", "["):
+                try:
+                    request_data = _loads(stripped)
+                except json.JSONDecodeError:
+                    request_data = None
+            
+            if request_data is not None:
                 request_type = request_data.get("type", "")
                 
-                if request_type == "initiate_arbitration":
-                    # 处理仲裁请求
-                    result = self.initiate_arbitration(request_data)
-                    response_text = json.dumps(result, ensure_ascii=False, indent=2)
-                elif request_type == "process_dispute":
-                    # 处理纠纷
-                    case_id = request_data.get("case_id")
-                    if case_id:
-                        result = self.process_dispute(case_id)
-                        response_text = json.dumps(result, ensure_ascii=False, indent=2)
-                    else:
-                        response_text = json.dumps({
-                            "success": False,
-                            "error": "缺少必需字段: case_id"
-                        }, ensure_ascii=False, indent=2)
-                elif request_type == "confirm_decision":
-                    # 处理确认请求
-                    case_id = request_data.get("case_id")
-                    party = request_data.get("party")  # "user" or "merchant"
-                    agreed = request_data.get("agreed", True)  # True表示同意，False表示不同意
-                    
-                    if case_id and party:
-                        result = self.confirm_decision(case_id, party, agreed)
-                        response_text = json.dumps(result, ensure_ascii=False, indent=2)
+                entry = self._handlers.get(request_type)
+                if entry is not None:
+                    handler, required = entry
+                    if all(request_data.get(f) for f in required):
+                        response_text = _dumps(handler(request_data))
                     else:
-                        response_text = json.dumps({
-                            "success": False,
-                            "error": "缺少必需字段: case_id 或 party"
-                        }, ensure_ascii=False, indent=2)
-                elif request_type == "check_timeout":
-                    # 检查确认超时
-                    case_id = request_data.get("case_id")
-                    if case_id:
-                        result = self.check_confirmation_timeout(case_id)
-                        response_text = json.dumps(result, ensure_ascii=False, indent=2)
-                    else:
-                        response_text = json.dumps({
-                            "success": False,
-                            "error": "缺少必需字段: case_id"
-                        }, ensure_ascii=False, indent=2)
-                elif request_type == "execute_decision":
-                    # 执行仲裁结果
-                    case_id = request_data.get("case_id")
-                    if case_id:
-                        result = self.execute_decision(case_id)
-                        response_text = json.dumps(result, ensure_ascii=False, indent=2)
-                    else:
-                        response_text = json.dumps({
-                            "success": False,
-                            "error": "缺少必需字段: case_id"
-                        }, ensure_ascii=False, indent=2)
+                        response_text = _err("缺少必需字段: " + " 或 ".join(required))
                 else:
                     response_text = f"未知的请求类型: {request_type}"
                     task.status = TaskStatus(state=TaskState.FAILED)
-            except json.JSONDecodeError:
+            else:
                 # 如果不是 JSON，尝试文本解析
                 text_lower = text.lower()
                 if any(keyword in text_lower for keyword in ["仲裁", "arbitration", "纠纷", "dispute"]):
@@ -186,9 +378,7 @@ class ArbitrationAgent(A2AServer):
             logger.info("✅ [ArbitrationAgent] 处理完成")
             
         except Exception as e:
-            import traceback
-            logger.error(f"❌ [ArbitrationAgent] 任务处理时发生错误: {e}")
-            traceback.print_exc()
+            logger.exception(f"❌ [ArbitrationAgent] 任务处理时发生错误: {e}")
             response_text = f"服务器内部错误: {e}"
             task.status = TaskStatus(state=TaskState.FAILED)
         
@@ -242,11 +432,8 @@ class ArbitrationAgent(A2AServer):
                 }
             
             # 检查是否已有该订单的仲裁案例
-            existing_case = None
-            for case in self.cases.values():
-                if case.order_id == order_id:
-                    existing_case = case
-                    break
+            existing_case_id = self._order_index.get(order_id)
+            existing_case = self._get_case(existing_case_id) if existing_case_id else None
             
             if existing_case:
                 logger.warning(f"⚠️ [ArbitrationAgent] 订单 {order_id} 已有仲裁案例: {existing_case.case_id}")
@@ -254,11 +441,11 @@ class ArbitrationAgent(A2AServer):
                     "success": False,
                     "error": f"该订单已有仲裁案例: {existing_case.case_id}",
                     "existing_case_id": existing_case.case_id,
-                    "existing_status": existing_case.status.value
+                    "existing_status": existing_case.status_value
                 }
             
             # 生成仲裁案例ID
-            case_id = f"ARB_{int(time.time())}_{order_id[:8]}"
+            case_id = _next_case_id()
             
             # 获取订单信息（如果提供）
             order_info = request_data.get("order_info", {})
@@ -276,6 +463,9 @@ class ArbitrationAgent(A2AServer):
             
             # 存储案例
             self.cases[case_id] = case
+            self._order_index[order_id] = case_id
+            self._by_status[case.status_value][case_id] = None
+            self._evict_terminal_cases()
             
             logger.info(f"✅ [ArbitrationAgent] 仲裁案例已创建: {case_id}, 订单: {order_id}")
             
@@ -284,16 +474,14 @@ class ArbitrationAgent(A2AServer):
                 "success": True,
                 "case_id": case_id,
                 "order_id": order_id,
-                "status": case.status.value,
-                "status_display": self.STATUS_DISPLAY.get(case.status.value, case.status.value),
+                "status": case.status_value,
+                "status_display": _STATUS_DISPLAY.get(case.status_value, case.status_value),
                 "message": f"仲裁请求已接收，案例ID: {case_id}",
                 "created_at": case.created_at
             }
             
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 接收仲裁请求失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 接收仲裁请求失败: {e}")
             return {
                 "success": False,
                 "error": f"接收仲裁请求失败: {str(e)}"
@@ -303,10 +491,7 @@ class ArbitrationAgent(A2AServer):
         """处理文本格式的仲裁请求（简化版）"""
         try:
             # 尝试从文本中提取订单ID
-            import re
-            order_match = re.search(r'订单[号]*[:\s]*([A-Za-z0-9_-]+)', text, re.IGNORECASE)
-            if not order_match:
-                order_match = re.search(r'order[_\s]*id[:\s]*([A-Za-z0-9_-]+)', text, re.IGNORECASE)
+            order_match = _ORDER_RE_CN.search(text) or _ORDER_RE_EN.search(text)
             
             if not order_match:
                 return "无法从请求中提取订单ID，请提供有效的订单ID。"
@@ -323,7 +508,7 @@ class ArbitrationAgent(A2AServer):
             }
             
             result = self.initiate_arbitration(request_data)
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            return _dumps(result)
             
         except Exception as e:
             return f"处理文本请求失败: {str(e)}"
@@ -350,7 +535,7 @@ class ArbitrationAgent(A2AServer):
         
         try:
             # 获取仲裁案例
-            case = self.cases.get(case_id)
+            case = self._get_case(case_id)
             if not case:
                 return {
                     "success": False,
@@ -358,51 +543,36 @@ class ArbitrationAgent(A2AServer):
                 }
             
             # 检查案例状态
-            if case.status != ArbitrationStatus.PENDING:
+            if case.status is not ArbitrationStatus.PENDING:
                 return {
                     "success": False,
-                    "error": f"案例状态不允许处理，当前状态: {case.status.value}",
-                    "current_status": case.status.value
+                    "error": f"案例状态不允许处理，当前状态: {case.status_value}",
+                    "current_status": case.status_value
                 }
             
             # 更新状态为处理中
-            case.status = ArbitrationStatus.PROCESSING
-            logger.info(f"📋 [ArbitrationAgent] 案例状态更新为: {case.status.value}")
+            self._set_status(case, ArbitrationStatus.PROCESSING)
+            logger.info(f"📋 [ArbitrationAgent] 案例状态更新为: {case.status_value}")
             
             # 从订单信息中提取状态
             order_info = case.order_info
-            order_status = order_info.get("status", "").upper() if isinstance(order_info, dict) else ""
-            
-            # 如果没有订单状态，尝试从其他字段推断
-            if not order_status:
-                # 检查是否有交付信息
-                delivery_info = order_info.get("delivery_info", {}) if isinstance(order_info, dict) else {}
-                if delivery_info and delivery_info.get("delivery_status"):
-                    order_status = "DELIVERED"
-                elif order_info.get("accepted_at") if isinstance(order_info, dict) else False:
-                    order_status = "ACCEPTED"
-                else:
-                    order_status = "PENDING"
+            order_status = _extract_order_status(order_info)
             
             # 调用 make_decision 做出裁定
             decision_result = self.make_decision(case_id, order_info, order_status)
             
             if not decision_result.get("success"):
                 # 如果裁定失败，恢复状态
-                case.status = ArbitrationStatus.PENDING
-                return decision_result
-            
-            if not decision_result.get("success"):
-                # 如果裁定失败，恢复状态
-                case.status = ArbitrationStatus.PENDING
+                self._set_status(case, ArbitrationStatus.PENDING)
                 return decision_result
             
             # 更新案例信息
             case.decision = decision_result["decision"]
             case.decision_reason = decision_result["decision_reason"]
             case.responsible_party = decision_result["responsible_party"]
-            case.status = ArbitrationStatus.DECIDED
-            case.decided_at = datetime.now().isoformat()
+            self._set_status(case, ArbitrationStatus.DECIDED)
+            case.decided_at = decided_at = _now_iso()
+            case.decided_at_parsed = (decided_at, datetime.fromisoformat(decided_at))
             
             logger.info(f"✅ [ArbitrationAgent] 纠纷处理完成: {case_id}, 裁定: {decision_result['decision'].value}")
             
@@ -415,21 +585,19 @@ class ArbitrationAgent(A2AServer):
                 "decision": decision_result["decision"].value,
                 "decision_reason": decision_result["decision_reason"],
                 "responsible_party": decision_result["responsible_party"],
-                "status": case.status.value,
-                "status_display": self.STATUS_DISPLAY.get(case.status.value, case.status.value),
+                "status": case.status_value,
+                "status_display": _STATUS_DISPLAY.get(case.status_value, case.status_value),
                 "decided_at": case.decided_at,
                 "message": f"纠纷处理完成，裁定结果: {decision_result['decision'].value}"
             }
             
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 处理纠纷失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 处理纠纷失败: {e}")
             
             # 如果案例存在，恢复状态
             if case_id in self.cases:
                 case = self.cases[case_id]
-                case.status = ArbitrationStatus.PENDING
+                self._set_status(case, ArbitrationStatus.PENDING)
             
             return {
                 "success": False,
@@ -469,56 +637,11 @@ class ArbitrationAgent(A2AServer):
         try:
             # 如果没有提供订单状态，从order_info中提取
             if not order_status:
-                order_status = order_info.get("status", "").upper() if isinstance(order_info, dict) else ""
-                
-                # 如果还是没有，尝试推断
-                if not order_status:
-                    delivery_info = order_info.get("delivery_info", {}) if isinstance(order_info, dict) else {}
-                    if delivery_info and delivery_info.get("delivery_status"):
-                        order_status = "DELIVERED"
-                    elif order_info.get("accepted_at") if isinstance(order_info, dict) else False:
-                        order_status = "ACCEPTED"
-                    else:
-                        order_status = "PENDING"
-            
-            # 基于订单状态做简单判断（简化版）
-            decision = None
-            decision_reason = ""
-            responsible_party = None
-            
-            if order_status in ["PENDING", "ACCEPTED", "PROCESSING"]:
-                # 未发货 → 支持用户
-                decision = ArbitrationDecision.SUPPORT_USER
-                decision_reason = f"订单状态为 {order_status}（未发货），商家未履行发货义务，支持用户退款请求。"
-                responsible_party = "merchant"
-                logger.info(f"✅ [ArbitrationAgent] 判断结果: 支持用户（未发货）")
-                
-            elif order_status == "DELIVERED":
-                # 已发货但未确认收货 → 需要更多信息
-                decision = ArbitrationDecision.PARTIAL_SUPPORT
-                decision_reason = "订单已发货但用户未确认收货，需要更多信息（交付证明、用户反馈等）来判断。"
-                responsible_party = "both"
-                logger.info(f"✅ [ArbitrationAgent] 判断结果: 部分支持（需要更多信息）")
-                    
-            elif order_status == "COMPLETED":
-                # 已确认收货 → 支持商家
-                decision = ArbitrationDecision.SUPPORT_MERCHANT
-                decision_reason = f"订单状态为 {order_status}（已确认收货），用户已确认收到商品，支持商家，驳回用户退款请求。"
-                responsible_party = "user"
-                logger.info(f"✅ [ArbitrationAgent] 判断结果: 支持商家（已确认收货）")
-                
-            else:
-                # 其他状态（如CANCELLED等）→ 需要更多信息
-                decision = ArbitrationDecision.PARTIAL_SUPPORT
-                decision_reason = f"订单状态为 {order_status}，需要更多信息（订单详情、取消原因等）来判断。"
-                responsible_party = "both"
-                logger.info(f"✅ [ArbitrationAgent] 判断结果: 部分支持（需要更多信息）")
-            
-            # 确保所有变量都已赋值
-            if decision is None:
-                decision = ArbitrationDecision.PARTIAL_SUPPORT
-                decision_reason = "无法确定订单状态，需要更多信息来判断。"
-                responsible_party = "both"
+                order_status = _extract_order_status(order_info)
+            
+            # 基于订单状态查表做简单判断（简化版），未列出的状态按需要更多信息处理
+            decision, decision_reason, responsible_party, summary = _resolve_status(order_status)
+            logger.info(f"✅ [ArbitrationAgent] 判断结果: {summary}")
             
             logger.info(f"✅ [ArbitrationAgent] 裁定完成: {case_id}, 裁定结果: {decision.value}")
             
@@ -532,9 +655,7 @@ class ArbitrationAgent(A2AServer):
             }
             
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 做出裁定失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 做出裁定失败: {e}")
             
             return {
                 "success": False,
@@ -570,7 +691,7 @@ class ArbitrationAgent(A2AServer):
         
         try:
             # 获取仲裁案例
-            case = self.cases.get(case_id)
+            case = self._get_case(case_id)
             if not case:
                 return {
                     "success": False,
@@ -578,11 +699,11 @@ class ArbitrationAgent(A2AServer):
                 }
             
             # 检查案例是否已裁定
-            if case.status != ArbitrationStatus.DECIDED:
+            if case.status is not ArbitrationStatus.DECIDED:
                 return {
                     "success": False,
-                    "error": f"案例尚未裁定，当前状态: {case.status.value}",
-                    "current_status": case.status.value
+                    "error": f"案例尚未裁定，当前状态: {case.status_value}",
+                    "current_status": case.status_value
                 }
             
             if not case.decision:
@@ -591,34 +712,22 @@ class ArbitrationAgent(A2AServer):
                     "error": "案例没有裁定结果"
                 }
             
-            # 构建通知消息
-            decision_display = {
-                ArbitrationDecision.SUPPORT_USER: "支持用户",
-                ArbitrationDecision.SUPPORT_MERCHANT: "支持商家",
-                ArbitrationDecision.PARTIAL_SUPPORT: "部分支持"
-            }.get(case.decision, case.decision.value)
-            
-            notification_message = f"""⚖️ **仲裁裁定结果通知**
-
-**案例信息**：
-- 案例ID: {case.case_id}
-- 订单ID: {case.order_id}
-- 纠纷描述: {case.dispute_description}
-
-**裁定结果**：
-- 裁定: {decision_display}
-- 裁定原因: {case.decision_reason or '无'}
-- 责任方: {case.responsible_party or '未确定'}
-
-**后续步骤**：
-请确认是否同意此裁定结果。双方都同意后，将执行仲裁结果。
-
-**重要提示**：
-- 如果一方不同意，可以申请升级为人工仲裁
-- 确认期限：24小时
-- 逾期未确认将视为默认同意
-
-请回复"同意"或"不同意"以确认裁定结果。"""
+            # 后续多次读取的字段取到局部变量
+            user_agent_url = case.user_agent_url
+            merchant_agent_url = case.merchant_agent_url
+            decision = case.decision
+            
+            # 构建通知消息（双方都没有URL时无需生成）
+            notification_message = None
+            if user_agent_url or merchant_agent_url:
+                notification_message = _NOTIFY_TEMPLATE.format_map({
+                    "case_id": case.case_id,
+                    "order_id": case.order_id,
+                    "dispute": case.dispute_description,
+                    "decision": _DECISION_DISPLAY.get(decision, decision.value),
+                    "reason": case.decision_reason or '无',
+                    "party": case.responsible_party or '未确定',
+                })
             
             # 通知结果
             user_notified = False
@@ -628,39 +737,47 @@ class ArbitrationAgent(A2AServer):
             user_error = None
             merchant_error = None
             
-            # 通知用户Agent
-            if case.user_agent_url:
-                user_result = self._notify_agent(
-                    agent_url=case.user_agent_url,
+            # 并发通知用户Agent和商家Agent（两者相互独立，均为阻塞的网络请求）
+            futures = {}
+            if user_agent_url:
+                futures["user"] = self._notify_executor.submit(
+                    self._notify_agent,
+                    agent_url=user_agent_url,
                     notification_text=notification_message,
                     agent_type="用户",
                     max_retries=max_retries,
                     retry_delay=retry_delay
                 )
-                user_notified = user_result.get("success", False)
-                user_response = user_result.get("response")
-                if not user_notified:
-                    user_error = user_result.get("error")
-                    logger.warning(f"⚠️ [ArbitrationAgent] 通知用户Agent失败: {user_error}")
             else:
                 logger.warning(f"⚠️ [ArbitrationAgent] 用户Agent URL为空，跳过通知")
             
-            # 通知商家Agent
-            if case.merchant_agent_url:
-                merchant_result = self._notify_agent(
-                    agent_url=case.merchant_agent_url,
+            if merchant_agent_url:
+                futures["merchant"] = self._notify_executor.submit(
+                    self._notify_agent,
+                    agent_url=merchant_agent_url,
                     notification_text=notification_message,
                     agent_type="商家",
                     max_retries=max_retries,
                     retry_delay=retry_delay
                 )
+            else:
+                logger.warning(f"⚠️ [ArbitrationAgent] 商家Agent URL为空，跳过通知")
+            
+            if "user" in futures:
+                user_result = futures["user"].result()
+                user_notified = user_result.get("success", False)
+                user_response = user_result.get("response")
+                if not user_notified:
+                    user_error = user_result.get("error")
+                    logger.warning(f"⚠️ [ArbitrationAgent] 通知用户Agent失败: {user_error}")
+            
+            if "merchant" in futures:
+                merchant_result = futures["merchant"].result()
                 merchant_notified = merchant_result.get("success", False)
                 merchant_response = merchant_result.get("response")
                 if not merchant_notified:
                     merchant_error = merchant_result.get("error")
                     logger.warning(f"⚠️ [ArbitrationAgent] 通知商家Agent失败: {merchant_error}")
-            else:
-                logger.warning(f"⚠️ [ArbitrationAgent] 商家Agent URL为空，跳过通知")
             
             # 判断整体是否成功（至少一方通知成功）
             overall_success = user_notified or merchant_notified
@@ -684,15 +801,22 @@ class ArbitrationAgent(A2AServer):
             }
             
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 通知双方失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 通知双方失败: {e}")
             return {
                 "success": False,
                 "error": f"通知双方失败: {str(e)}",
                 "case_id": case_id
             }
     
+    def _client_for(self, agent_url: str) -> A2AClient:
+        """获取指定URL的复用客户端（通知线程池中并发调用，需加锁）"""
+        with self._client_cache_lock:
+            client = self._client_cache.get(agent_url)
+            if client is None:
+                client = A2AClient(agent_url)
+                self._client_cache[agent_url] = client
+            return client
+    
     def _notify_agent(
         self,
         agent_url: str,
@@ -709,7 +833,7 @@ class ArbitrationAgent(A2AServer):
             notification_text: 通知文本
             agent_type: Agent类型（用于日志）
             max_retries: 最大重试次数
-            retry_delay: 重试延迟（秒）
+            retry_delay: 重试基础延迟（秒），第n次重试前随机等待 [0, retry_delay * 2^(n-1)]，不超过MAX_RETRY_BACKOFF
         
         Returns:
             包含通知结果的字典
@@ -720,8 +844,8 @@ class ArbitrationAgent(A2AServer):
             try:
                 logger.info(f"🔄 [ArbitrationAgent] 尝试通知{agent_type}Agent (第 {attempt}/{max_retries} 次): {agent_url}")
                 
-                # 使用 A2AClient 连接Agent
-                client = A2AClient(agent_url)
+                # 使用 A2AClient 连接Agent（按URL复用已创建的客户端）
+                client = self._client_for(agent_url)
                 
                 # 发送通知
                 response = client.ask(notification_text)
@@ -730,12 +854,10 @@ class ArbitrationAgent(A2AServer):
                 
                 # 尝试解析响应（可能是 JSON 格式或文本格式）
                 try:
-                    # 尝试解析 JSON 格式的响应
-                    if "{" in response and "}" in response:
-                        start = response.find("{")
-                        end = response.rfind("}") + 1
-                        json_str = response[start:end]
-                        parsed_response = json.loads(json_str)
+                    # 尝试解析 JSON 格式的响应：从第一个 "{" 开始解析，到对象闭合处为止
+                    start = response.find("{")
+                    if start >= 0:
+                        parsed_response, _ = _JSON_DECODER.raw_decode(response, start)
                         
                         if parsed_response.get("success") or parsed_response.get("status") in ["received", "agreed", "disagreed"]:
                             logger.info(f"✅ [ArbitrationAgent] {agent_type}Agent成功接收通知")
@@ -771,15 +893,15 @@ class ArbitrationAgent(A2AServer):
                 last_error = f"连接{agent_type}Agent失败: {str(e)}"
                 logger.warning(f"⚠️ [ArbitrationAgent] 第 {attempt} 次尝试失败: {last_error}")
                 
-                # 如果不是最后一次尝试，等待后重试
+                # 如果不是最后一次尝试，按指数退避（全抖动）等待后重试
                 if attempt < max_retries:
-                    time.sleep(retry_delay)
+                    time.sleep(random.uniform(0, min(retry_delay * (1 << (attempt - 1)), MAX_RETRY_BACKOFF)))
         
         # 所有重试都失败
         logger.error(f"❌ [ArbitrationAgent] 通知{agent_type}Agent失败（已重试{max_retries}次）")
-            return {
-                "success": False,
-                "error": last_error or f"通知{agent_type}Agent失败"
+        return {
+            "success": False,
+            "error": last_error or f"通知{agent_type}Agent失败"
         }
     
     def confirm_decision(
@@ -803,7 +925,7 @@ class ArbitrationAgent(A2AServer):
         
         try:
             # 获取仲裁案例
-            case = self.cases.get(case_id)
+            case = self._get_case(case_id)
             if not case:
                 return {
                     "success": False,
@@ -811,11 +933,11 @@ class ArbitrationAgent(A2AServer):
                 }
             
             # 检查案例状态
-            if case.status != ArbitrationStatus.DECIDED:
+            if case.status is not ArbitrationStatus.DECIDED:
                 return {
                     "success": False,
-                    "error": f"案例尚未裁定，当前状态: {case.status.value}",
-                    "current_status": case.status.value
+                    "error": f"案例尚未裁定，当前状态: {case.status_value}",
+                    "current_status": case.status_value
                 }
             
             # 更新确认状态
@@ -834,7 +956,7 @@ class ArbitrationAgent(A2AServer):
             # 检查双方确认状态
             if not agreed:
                 # 一方不同意，标记为升级
-                case.status = ArbitrationStatus.ESCALATED
+                self._set_status(case, ArbitrationStatus.ESCALATED)
                 logger.info(f"⚠️ [ArbitrationAgent] {party} 不同意裁定结果，案例已标记为升级: {case_id}")
                 
                 return {
@@ -842,7 +964,7 @@ class ArbitrationAgent(A2AServer):
                     "case_id": case_id,
                     "party": party,
                     "agreed": False,
-                    "status": case.status.value,
+                    "status": case.status_value,
                     "message": f"{party} 不同意裁定结果，案例已标记为升级为人工仲裁",
                     "escalated": True
                 }
@@ -850,7 +972,7 @@ class ArbitrationAgent(A2AServer):
             # 检查是否双方都同意
             if case.user_agreed and case.merchant_agreed:
                 # 双方都同意，执行结果
-                case.status = ArbitrationStatus.AGREED
+                self._set_status(case, ArbitrationStatus.AGREED)
                 logger.info(f"✅ [ArbitrationAgent] 双方都同意，准备执行结果: {case_id}")
                 
                 # 执行结果
@@ -862,7 +984,7 @@ class ArbitrationAgent(A2AServer):
                     "party": party,
                     "agreed": True,
                     "both_agreed": True,
-                    "status": case.status.value,
+                    "status": case.status_value,
                     "execution_result": execution_result,
                     "message": "双方都同意，仲裁结果已执行"
                 }
@@ -875,15 +997,13 @@ class ArbitrationAgent(A2AServer):
                     "party": party,
                     "agreed": True,
                     "both_agreed": False,
-                    "status": case.status.value,
+                    "status": case.status_value,
                     "waiting_for": waiting_for,
                     "message": f"{party} 已同意，等待 {waiting_for} 确认"
                 }
         
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 处理确认失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 处理确认失败: {e}")
             
             return {
                 "success": False,
@@ -904,37 +1024,38 @@ class ArbitrationAgent(A2AServer):
         logger.info(f"⏰ [ArbitrationAgent] 检查确认超时: {case_id}")
         
         try:
-            case = self.cases.get(case_id)
+            case = self._get_case(case_id)
             if not case:
                 return {
                     "success": False,
                     "error": f"仲裁案例不存在: {case_id}"
                 }
             
-            if case.status != ArbitrationStatus.DECIDED:
+            if case.status is not ArbitrationStatus.DECIDED:
                 return {
                     "success": False,
-                    "error": f"案例状态不是 DECIDED，当前状态: {case.status.value}"
+                    "error": f"案例状态不是 DECIDED，当前状态: {case.status_value}"
                 }
             
-            if not case.decided_at:
+            decided_at = case.decided_at
+            if not decided_at:
                 return {
                     "success": False,
                     "error": "案例没有裁定时间，无法检查超时"
                 }
             
-            # 计算时间差
-            from datetime import datetime, timedelta
-            decided_time = datetime.fromisoformat(case.decided_at.replace('Z', '+00:00') if 'Z' in case.decided_at else case.decided_at)
-            now = datetime.now()
-            time_diff = now - decided_time.replace(tzinfo=None)
+            # 计算时间差（裁定时间在写入时已解析；decided_at 被外部改写时才重新解析）
+            parsed = case.decided_at_parsed
+            if parsed is None or parsed[0] is not decided_at:
+                decided_time = datetime.fromisoformat(decided_at.replace('Z', '+00:00') if 'Z' in decided_at else decided_at)
+                case.decided_at_parsed = parsed = (decided_at, decided_time.replace(tzinfo=None))
+            elapsed_seconds = (datetime.now() - parsed[1]).total_seconds()
             
-            # 24小时 = 86400秒
-            timeout_seconds = 24 * 60 * 60
-            is_timeout = time_diff.total_seconds() > timeout_seconds
+            timeout_seconds = CONFIRMATION_TIMEOUT_SECONDS
+            is_timeout = elapsed_seconds > timeout_seconds
             
             if is_timeout:
-                logger.info(f"⏰ [ArbitrationAgent] 确认超时: {case_id}, 已过 {time_diff.total_seconds() / 3600:.1f} 小时")
+                logger.info(f"⏰ [ArbitrationAgent] 确认超时: {case_id}, 已过 {elapsed_seconds / 3600:.1f} 小时")
                 
                 # 将未确认的一方视为默认同意
                 if not case.user_agreed:
@@ -947,15 +1068,15 @@ class ArbitrationAgent(A2AServer):
                 
                 # 如果双方都同意（包括默认同意），执行结果
                 if case.user_agreed and case.merchant_agreed:
-                    case.status = ArbitrationStatus.AGREED
+                    self._set_status(case, ArbitrationStatus.AGREED)
                     execution_result = self.execute_decision(case_id)
                     
                     return {
                         "success": True,
                         "case_id": case_id,
                         "timeout": True,
-                        "time_elapsed_hours": time_diff.total_seconds() / 3600,
-                        "status": case.status.value,
+                        "time_elapsed_hours": elapsed_seconds / 3600,
+                        "status": case.status_value,
                         "execution_result": execution_result,
                         "message": "确认超时，双方视为默认同意，仲裁结果已执行"
                     }
@@ -964,12 +1085,12 @@ class ArbitrationAgent(A2AServer):
                         "success": True,
                         "case_id": case_id,
                         "timeout": True,
-                        "time_elapsed_hours": time_diff.total_seconds() / 3600,
-                        "status": case.status.value,
+                        "time_elapsed_hours": elapsed_seconds / 3600,
+                        "status": case.status_value,
                         "message": "确认超时，但仍有未确认方"
                     }
             else:
-                remaining_hours = (timeout_seconds - time_diff.total_seconds()) / 3600
+                remaining_hours = (timeout_seconds - elapsed_seconds) / 3600
                 return {
                     "success": True,
                     "case_id": case_id,
@@ -981,9 +1102,7 @@ class ArbitrationAgent(A2AServer):
                 }
         
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 检查超时失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 检查超时失败: {e}")
             
             return {
                 "success": False,
@@ -1004,18 +1123,18 @@ class ArbitrationAgent(A2AServer):
         logger.info(f"⚙️ [ArbitrationAgent] 开始执行仲裁结果: {case_id}")
         
         try:
-            case = self.cases.get(case_id)
+            case = self._get_case(case_id)
             if not case:
                 return {
                     "success": False,
                     "error": f"仲裁案例不存在: {case_id}"
                 }
             
-            if case.status != ArbitrationStatus.AGREED:
+            if case.status is not ArbitrationStatus.AGREED:
                 return {
                     "success": False,
-                    "error": f"案例状态不是 AGREED，当前状态: {case.status.value}",
-                    "current_status": case.status.value
+                    "error": f"案例状态不是 AGREED，当前状态: {case.status_value}",
+                    "current_status": case.status_value
                 }
             
             if not case.decision:
@@ -1025,17 +1144,19 @@ class ArbitrationAgent(A2AServer):
                 }
             
             # 更新状态为已执行
-            case.status = ArbitrationStatus.EXECUTED
-            case.executed_at = datetime.now().isoformat()
+            self._set_status(case, ArbitrationStatus.EXECUTED)
+            case.executed_at = executed_at = _now_iso()
+            decision_value = case.decision.value
+            responsible_party = case.responsible_party
             
             logger.info(f"✅ [ArbitrationAgent] 仲裁结果已执行: {case_id}")
-            logger.info(f"   裁定结果: {case.decision.value}")
-            logger.info(f"   责任方: {case.responsible_party}")
-            logger.info(f"   执行时间: {case.executed_at}")
+            logger.info(f"   裁定结果: {decision_value}")
+            logger.info(f"   责任方: {responsible_party}")
+            logger.info(f"   执行时间: {executed_at}")
             
             # 记录责任方（用于后续费用结算）
             # 责任方信息已记录在 case.responsible_party 中
-            logger.info(f"📝 [ArbitrationAgent] 责任方已记录: {case.responsible_party} (费用结算后续实现)")
+            logger.info(f"📝 [ArbitrationAgent] 责任方已记录: {responsible_party} (费用结算后续实现)")
             
             # 根据裁定更新订单状态
             order_update_result = self._update_order_status(case)
@@ -1047,19 +1168,17 @@ class ArbitrationAgent(A2AServer):
                 "success": True,
                 "case_id": case_id,
                 "order_id": case.order_id,
-                "decision": case.decision.value,
-                "responsible_party": case.responsible_party,  # 责任方已记录
-                "executed_at": case.executed_at,
-                "status": case.status.value,
+                "decision": decision_value,
+                "responsible_party": responsible_party,  # 责任方已记录
+                "executed_at": executed_at,
+                "status": case.status_value,
                 "order_update_result": order_update_result,
                 "notification_result": notification_result,
-                "message": f"仲裁结果已执行: {case.decision.value}, 责任方: {case.responsible_party}"
+                "message": f"仲裁结果已执行: {decision_value}, 责任方: {responsible_party}"
             }
         
         except Exception as e:
-            logger.error(f"❌ [ArbitrationAgent] 执行结果失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [ArbitrationAgent] 执行结果失败: {e}")
             
             return {
                 "success": False,
@@ -1069,16 +1188,54 @@ class ArbitrationAgent(A2AServer):
     
     def get_case(self, case_id: str) -> Optional[ArbitrationCase]:
         """获取仲裁案例"""
+        return self._get_case(case_id)
+    
+    def _get_case(self, case_id: str) -> Optional[ArbitrationCase]:
+        """获取仲裁案例，已终结的案例同时标记为最近访问"""
+        if case_id in self._terminal_lru:
+            self._terminal_lru.move_to_end(case_id)
         return self.cases.get(case_id)
     
+    def _set_status(self, case: ArbitrationCase, status: ArbitrationStatus) -> None:
+        """更新案例状态，并同步其字符串值与按状态索引（案例状态的唯一变更入口）"""
+        if case.status is status:
+            return
+        self._by_status[case.status_value].pop(case.case_id, None)
+        case.status = status
+        case.status_value = status.value
+        self._by_status[case.status_value][case.case_id] = None
+        if status in _TERMINAL_STATUSES:
+            self._terminal_lru[case.case_id] = None
+            self._terminal_lru.move_to_end(case.case_id)
+        else:
+            self._terminal_lru.pop(case.case_id, None)
+    
+    def _evict_terminal_cases(self) -> None:
+        """案例数超过上限时，从最久未访问处开始淘汰已执行/已升级的案例"""
+        excess = len(self.cases) - self.MAX_ACTIVE_CASES
+        if excess <= 0:
+            return
+        
+        victims = list(islice(self._terminal_lru, excess))
+        for case_id in victims:
+            del self._terminal_lru[case_id]
+            case = self.cases.pop(case_id)
+            self._by_status[case.status_value].pop(case_id, None)
+            if self._order_index.get(case.order_id) == case_id:
+                del self._order_index[case.order_id]
+        if victims:
+            logger.info(f"🧹 [ArbitrationAgent] 已淘汰 {len(victims)} 个已终结案例")
+    
     def list_cases(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
         """列出仲裁案例"""
-        cases = list(self.cases.values())
-        
         if status:
-            cases = [c for c in cases if c.status.value == status]
-        
-        return [case.to_dict() for case in cases]
+            cases = self.cases
+            return [cases[case_id].to_dict() for case_id in self._by_status.get(status, ())]
+        return [case.to_dict() for case in self.cases.values()]
+    
+    def shutdown(self):
+        """关闭服务器：停止通知线程池（不等待进行中的通知）"""
+        self._notify_executor.shutdown(wait=False)
 
 
 # ==============================================================================
@@ -1111,7 +1268,10 @@ def main():
     # 创建并启动服务器
     agent = ArbitrationAgent(agent_card=agent_card)
     logger.info(f"🚀 [ArbitrationAgent] 启动仲裁 Agent 服务器，端口: {port}")
-    run_server(agent, port=port)
+    try:
+        run_server(agent, port=port)
+    finally:
+        agent.shutdown()
 
 
 if __name__ == "__main__":
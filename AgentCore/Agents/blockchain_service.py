@@ -7,22 +7,112 @@ import os
 import json
 import logging
 import hashlib
-from typing import Dict, Any, Optional
-from datetime import datetime
-from dataclasses import dataclass, asdict
+import operator
+import threading
+import time
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, List
+from dataclasses import dataclass
 from web3 import Web3
 from eth_account import Account
 
+try:
+    from .time_utils import now_iso as _now_iso
+except ImportError:
+    from time_utils import now_iso as _now_iso
+
 # --- 日志配置 ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("BlockchainService")
 
+# 等待交易收据的超时时间（秒）
+RECEIPT_TIMEOUT = 120
+
+# 上链数据的规范JSON编码器（复用同一实例，避免每次 json.dumps 重新构造编码器）
+# 注意：数据哈希基于此编码结果计算，修改编码参数会导致已上链数据无法验证
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False)
+
+# gas price 缓存时间（秒）
+GAS_PRICE_TTL = 3.0
+
+# 余额检查通过后的有效期（秒），期间不再逐笔查询余额
+BALANCE_CHECK_INTERVAL = 30.0
+
+# 验证交易时缓存的已查询交易数上限
+TX_CACHE_SIZE = 4096
+
+# 数据存储交易的 gas limit（数据存储交易通常需要更多 gas，设置一个合理的值）
+DATA_TX_GAS_LIMIT = 100000
+
+# 零地址（数据存储交易的默认接收地址）
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# 节点返回的 nonce 冲突错误特征（本地 nonce 落后于链上时出现）
+_NONCE_CONFLICT_MARKERS = ("nonce too low", "replacement transaction underpriced", "replacement underpriced")
+
+
+def _is_nonce_conflict(error: Exception) -> bool:
+    """判断发送失败是否由本地 nonce 与链上不一致引起"""
+    message = str(error).lower()
+    return any(marker in message for marker in _NONCE_CONFLICT_MARKERS)
+
+
+@lru_cache(maxsize=256)
+def _to_checksum_address(address: str) -> str:
+    """地址转换为校验和格式（结果缓存，常用接收地址只计算一次）"""
+    return Web3.to_checksum_address(address)
+
+
+# --- Merkle 树（批量上链） ---
+def _merkle_parent(a: bytes, b: bytes) -> bytes:
+    """计算父节点：两个子节点按字节序排序后拼接哈希（验证时无需区分左右）；加前缀区分内部节点与叶子"""
+    return hashlib.sha256(b"\x01" + (a + b if a <= b else b + a)).digest()
+
+
+def _merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """自底向上构建 Merkle 树的各层，最后一层为 [根]"""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_merkle_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            # 奇数个节点时最后一个直接上移
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def _merkle_proof(levels: List[List[bytes]], index: int) -> List[bytes]:
+    """生成第 index 个叶子的 Merkle 证明（自底向上的兄弟节点）"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def _merkle_root_from_proof(leaf: bytes, proof: List[bytes]) -> bytes:
+    """由叶子和 Merkle 证明计算树根"""
+    node = leaf
+    for sibling in proof:
+        node = _merkle_parent(node, sibling)
+    return node
+
 
 # ==============================================================================
 #  上链数据结构定义
 # ==============================================================================
-@dataclass
-class OnChainTransactionData:
+class _SerializationCache:
+    """序列化结果与哈希的缓存槽位，放在基类中使其不属于数据类字段（不参与 fields/asdict/replace/比较）"""
+    __slots__ = ("_cached_json", "_cached_hash", "_cached_digest")
+
+
+@dataclass(slots=True)
+class OnChainTransactionData(_SerializationCache):
     """上链交易数据模型"""
     order_id: str
     user_address: str  # 用户钱包地址
@@ -36,27 +126,72 @@ class OnChainTransactionData:
     product_info: Dict[str, Any] = None  # 商品信息
     delivery_info: Dict[str, Any] = None  # 交付信息
     
+    # 任一字段被重新赋值时清空缓存（构造时的首次赋值同时完成缓存槽位的初始化）
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if not name.startswith("_cached_"):
+            object.__setattr__(self, "_cached_json", None)
+            object.__setattr__(self, "_cached_hash", None)
+            object.__setattr__(self, "_cached_digest", None)
+    
     def __post_init__(self):
         """初始化后处理"""
         if not self.timestamp:
-            self.timestamp = datetime.now().isoformat()
+            self.timestamp = _now_iso()
         if self.product_info is None:
             self.product_info = {}
         if self.delivery_info is None:
             self.delivery_info = {}
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（product_info / delivery_info 为副本，修改返回值不会影响实例及其缓存）"""
+        return {
+            "order_id": self.order_id,
+            "user_address": self.user_address,
+            "merchant_address": self.merchant_address,
+            "amount": self.amount,
+            "currency": self.currency,
+            "payment_tx_hash": self.payment_tx_hash,
+            "delivery_tx_hash": self.delivery_tx_hash,
+            "status": self.status,
+            "timestamp": self.timestamp,
+            "product_info": dict(self.product_info),
+            "delivery_info": dict(self.delivery_info)
+        }
     
     def to_json(self) -> str:
-        """序列化为JSON字符串"""
-        return json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False)
+        """序列化为JSON字符串（结果缓存在实例上）"""
+        if self._cached_json is None:
+            self._cached_json = _CANONICAL_ENCODER.encode(self.to_dict())
+        return self._cached_json
+    
+    def calculate_digest(self) -> bytes:
+        """计算数据哈希的原始字节（32字节，写入交易 input data，结果缓存在实例上）"""
+        if self._cached_digest is None:
+            self._cached_digest = hashlib.sha256(self.to_json().encode('utf-8')).digest()
+        return self._cached_digest
     
     def calculate_hash(self) -> str:
-        """计算数据哈希"""
-        json_str = self.to_json()
-        return hashlib.sha256(json_str.encode('utf-8')).hexdigest()
+        """计算数据哈希的十六进制字符串（结果缓存在实例上）"""
+        if self._cached_hash is None:
+            self._cached_hash = self.calculate_digest().hex()
+        return self._cached_hash
+
+
+# --- 从订单子对象中提取上链字段：(字段名, 缺省值, 批量取值器) ---
+_PRODUCT_FIELD_DEFAULTS = {"product_id": '', "product_name": '', "quantity": 1, "unit_price": 0.0}
+_DELIVERY_FIELD_DEFAULTS = {"delivery_method": '', "tracking_number": '', "carrier": '', "actual_delivery_date": ''}
+_PRODUCT_FIELDS = (tuple(_PRODUCT_FIELD_DEFAULTS), _PRODUCT_FIELD_DEFAULTS, operator.attrgetter(*_PRODUCT_FIELD_DEFAULTS))
+_DELIVERY_FIELDS = (tuple(_DELIVERY_FIELD_DEFAULTS), _DELIVERY_FIELD_DEFAULTS, operator.attrgetter(*_DELIVERY_FIELD_DEFAULTS))
+
+
+def _read_fields(obj: Any, spec: tuple) -> Dict[str, Any]:
+    """按字段规格读取对象属性；对象缺少某个属性时退回逐个取值并使用缺省值"""
+    names, defaults, getter = spec
+    try:
+        return dict(zip(names, getter(obj)))
+    except AttributeError:
+        return {name: getattr(obj, name, default) for name, default in defaults.items()}
 
 
 # ==============================================================================
@@ -104,6 +239,8 @@ class BlockchainService:
         # 商家账户信息
         self.merchant_private_key = merchant_private_key or os.environ.get("MERCHANT_PRIVATE_KEY")
         self.merchant_address = merchant_address
+        # 由私钥推导出的签名账户（私钥在服务生命周期内不变，只推导一次）
+        self._signing_account = None
         
         if self.merchant_private_key:
             # 确保私钥格式正确
@@ -112,22 +249,67 @@ class BlockchainService:
             
             # 从私钥推导地址
             try:
-                account = Account.from_key(self.merchant_private_key)
-                self.merchant_address = account.address
+                self._signing_account = Account.from_key(self.merchant_private_key)
+                self.merchant_address = self._signing_account.address
                 logger.info(f"✅ [BlockchainService] 商家地址: {self.merchant_address}")
             except Exception as e:
                 logger.error(f"❌ [BlockchainService] 无法从私钥推导地址: {e}")
                 self.merchant_private_key = None
         else:
             logger.warning("⚠️ [BlockchainService] 未提供商家私钥，上链功能可能受限")
+        
+        # 后台等待交易收据的线程池，以及 交易哈希 -> 尚未确认的收据 Future
+        self._receipt_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="blockchain-receipt")
+        self._pending: Dict[str, Future] = {}
+        
+        # 本地维护的下一个 nonce（首次使用时从链上获取，之后每发送一笔交易自增）
+        self._nonce_lock = threading.Lock()
+        self._next_nonce: Optional[int] = None
+        
+        # 交易哈希 -> (交易收据, 交易详情) 的LRU缓存，用于重复验证同一交易
+        self._tx_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        
+        # gas price 缓存 (价格, 获取时间)，以及余额检查通过的有效期
+        self._gas_price_cache = (0, float("-inf"))
+        self._balance_ok_until = 0.0
+        
+        # 交易中每次都相同的字段，构建交易时在此基础上补充 to/data/nonce/gasPrice
+        self._tx_template = {
+            'value': 0,  # 不发送 IOTX，只存储数据
+            'gas': DATA_TX_GAS_LIMIT,
+            'chainId': self.chain_id
+        }
     
-    def store_transaction_on_chain(
+    def _allocate_nonce(self, from_address: str) -> int:
+        """分配下一个交易 nonce"""
+        with self._nonce_lock:
+            if self._next_nonce is None:
+                self._next_nonce = self.web3.eth.get_transaction_count(from_address, 'pending')
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+    
+    def _get_gas_price(self) -> int:
+        """获取 gas price（GAS_PRICE_TTL 秒内复用上次查询结果）"""
+        now = time.monotonic()
+        gas_price, fetched_at = self._gas_price_cache
+        if now - fetched_at >= GAS_PRICE_TTL:
+            gas_price = self.web3.eth.gas_price
+            self._gas_price_cache = (gas_price, now)
+        return gas_price
+    
+    def _reset_nonce(self) -> None:
+        """丢弃本地 nonce，下次发送时重新从链上获取"""
+        with self._nonce_lock:
+            self._next_nonce = None
+    
+    def _submit_transaction(
         self,
         transaction_data: OnChainTransactionData,
         to_address: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        将交易信息存储到链上
+        发送上链交易（内部方法），成功时结果中附带等待收据的 Future
         
         实现步骤：
         1. 将订单数据序列化为 JSON
@@ -142,23 +324,9 @@ class BlockchainService:
             to_address: 接收地址（可选，如果提供则发送到该地址，否则发送到零地址）
             
         Returns:
-            包含交易哈希和状态的字典
+            包含交易哈希和数据哈希的字典（此时交易尚未确认）
         """
         try:
-            # 检查连接
-            if not self.web3.is_connected():
-                return {
-                    "success": False,
-                    "error": "无法连接到 IoTeX 网络"
-                }
-            
-            # 检查是否有私钥
-            if not self.merchant_private_key:
-                return {
-                    "success": False,
-                    "error": "未提供商家私钥，无法签名交易"
-                }
-            
             # 步骤1: 将订单数据序列化为 JSON
             json_data = transaction_data.to_json()
             logger.info(f"📝 [BlockchainService] 步骤1: 数据序列化为JSON，长度: {len(json_data)} 字符")
@@ -168,34 +336,74 @@ class BlockchainService:
             data_hash = transaction_data.calculate_hash()
             logger.info(f"📊 [BlockchainService] 步骤2: 计算数据哈希 (SHA256): {data_hash}")
             
-            # 步骤3: 将哈希写入交易 input data（作为交易备注）
-            # SHA256 哈希是64个十六进制字符（32字节）
-            # 将哈希编码为 bytes
-            hash_bytes = bytes.fromhex(data_hash)
-            
-            # 验证哈希长度（SHA256 应该是32字节）
-            if len(hash_bytes) != 32:
-                logger.warning(f"⚠️ [BlockchainService] 哈希长度异常: {len(hash_bytes)} 字节，预期32字节")
-                # 如果长度不对，进行调整
-                if len(hash_bytes) < 32:
-                    hash_bytes = hash_bytes + b'\x00' * (32 - len(hash_bytes))
-                else:
-                    hash_bytes = hash_bytes[:32]
-            
-            logger.info(f"📝 [BlockchainService] 步骤3: 准备将哈希写入交易 input data: {data_hash[:16]}...")
+            # 步骤3 & 4: 将哈希写入交易 input data 并发送
+            sent = self._send_data_transaction(transaction_data.calculate_digest(), to_address)
+            if not sent["success"]:
+                return sent
+            tx_hash_hex = sent["tx_hash"]
             
-            # 目标地址：如果提供则使用，否则使用零地址（作为数据存储交易）
-            if to_address:
-                to_address = self.web3.to_checksum_address(to_address)
-            else:
-                # 使用零地址，表示这是一个数据存储交易
-                to_address = "0x0000000000000000000000000000000000000000"
+            return {
+                "success": True,
+                "tx_hash": tx_hash_hex,
+                "data_hash": data_hash,
+                "json_data": json_data,  # 包含原始JSON数据（用于验证）
+                "transaction_data": transaction_data.to_dict(),
+                "message": f"交易已发送，等待确认中，交易哈希: {tx_hash_hex}",
+                "_receipt_future": sent["_receipt_future"]
+            }
             
-            # 获取账户信息
-            account = Account.from_key(self.merchant_private_key)
-            from_address = account.address
+        except Exception as e:
+            logger.exception(f"❌ [BlockchainService] 上链失败: {e}")
+            return {
+                "success": False,
+                "error": f"上链失败: {str(e)}"
+            }
+    
+    def _send_data_transaction(
+        self,
+        hash_bytes: bytes,
+        to_address: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        将32字节哈希写入交易 input data 并发送（内部方法）
+        
+        Args:
+            hash_bytes: 写入 input data 的哈希原始字节
+            to_address: 接收地址（可选，默认零地址）
             
-            # 检查余额（需要足够的 IOTX 支付 gas）
+        Returns:
+            成功时包含交易哈希和等待收据的 Future，失败时包含错误信息
+        """
+        # 检查连接
+        if not self.web3.is_connected():
+            return {
+                "success": False,
+                "error": "无法连接到 IoTeX 网络"
+            }
+        
+        # 检查是否有私钥
+        if not self.merchant_private_key:
+            return {
+                "success": False,
+                "error": "未提供商家私钥，无法签名交易"
+            }
+        
+        data_hash_prefix = hash_bytes[:8].hex()
+        logger.info(f"📝 [BlockchainService] 步骤3: 准备将哈希写入交易 input data: {data_hash_prefix}...")
+        
+        # 目标地址：如果提供则使用，否则使用零地址（作为数据存储交易）
+        if to_address:
+            to_address = _to_checksum_address(to_address)
+        else:
+            # 使用零地址，表示这是一个数据存储交易
+            to_address = ZERO_ADDRESS
+        
+        # 获取账户信息
+        from_address = self._signing_account.address
+        
+        # 检查余额（需要足够的 IOTX 支付 gas）
+        # 最近一次检查余额充足时，在 BALANCE_CHECK_INTERVAL 内跳过查询
+        if time.monotonic() >= self._balance_ok_until:
             balance = self.web3.eth.get_balance(from_address)
             balance_iotx = self.web3.from_wei(balance, 'ether')
             
@@ -205,85 +413,225 @@ class BlockchainService:
                     "success": False,
                     "error": f"账户余额不足，需要至少 0.001 IOTX，当前余额: {balance_iotx} IOTX"
                 }
+            self._balance_ok_until = time.monotonic() + BALANCE_CHECK_INTERVAL
+        
+        gas_price = self._get_gas_price()
+        
+        for attempt in range(2):
+            # 获取 nonce（本地分配，避免每笔交易一次RPC），分配后立即签名并发送
+            nonce = self._allocate_nonce(from_address)
+            try:
+                # 构建交易（固定字段来自模板）
+                transaction = {
+                    **self._tx_template,
+                    'to': to_address,
+                    'data': hash_bytes,  # 将数据哈希存储在 input data 中
+                    'gasPrice': gas_price,
+                    'nonce': nonce
+                }
+                
+                logger.info(f"📝 [BlockchainService] 构建交易: from={from_address}, to={to_address}, data_hash={data_hash_prefix}...")
+                
+                # 签名交易
+                signed_txn = self.web3.eth.account.sign_transaction(transaction, self.merchant_private_key)
+                
+                # 步骤4: 发送交易并获取交易哈希
+                tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+                break
+            except Exception as e:
+                # 分配的 nonce 未能发出，本地计数已与链上不一致，下次重新从链上获取
+                self._reset_nonce()
+                if attempt == 0 and _is_nonce_conflict(e):
+                    # nonce 已被占用（例如其他进程使用同一私钥发送了交易），按链上计数重试一次
+                    logger.warning(f"⚠️ [BlockchainService] nonce {nonce} 冲突，重新获取后重试: {e}")
+                    continue
+                raise
+        
+        tx_hash_hex = tx_hash.hex()
+        
+        logger.info(f"✅ [BlockchainService] 步骤4: 交易已发送，交易哈希: {tx_hash_hex}")
+        
+        # 在后台线程等待交易确认，调用方无需阻塞
+        future = self._receipt_executor.submit(
+            self.web3.eth.wait_for_transaction_receipt, tx_hash, timeout=RECEIPT_TIMEOUT
+        )
+        self._pending[tx_hash_hex] = future
+        future.add_done_callback(lambda _f, key=tx_hash_hex: self._pending.pop(key, None))
+        
+        return {
+            "success": True,
+            "tx_hash": tx_hash_hex,
+            "_receipt_future": future
+        }
+    
+    def _wait_for_confirmation(self, result: Dict[str, Any], future: Future) -> Dict[str, Any]:
+        """
+        等待后台确认结果，并在发送结果上补充区块信息（内部方法）
+        
+        Args:
+            result: 交易发送成功时的结果字典
+            future: 等待交易收据的 Future
             
-            # 获取 nonce
-            nonce = self.web3.eth.get_transaction_count(from_address)
-            
-            # 估算 gas（数据存储交易通常需要更多 gas）
-            gas_limit = 100000  # 设置一个合理的 gas limit
-            gas_price = self.web3.eth.gas_price
-            
-            # 构建交易
-            transaction = {
-                'to': to_address,
-                'value': 0,  # 不发送 IOTX，只存储数据
-                'data': hash_bytes,  # 将数据哈希存储在 input data 中
-                'gas': gas_limit,
-                'gasPrice': gas_price,
-                'nonce': nonce,
-                'chainId': self.chain_id
+        Returns:
+            最终的上链结果字典
+        """
+        tx_hash_hex = result["tx_hash"]
+        try:
+            receipt = future.result()
+        except Exception as e:
+            logger.warning(f"⚠️ [BlockchainService] 等待交易确认超时: {e}")
+            # 即使超时，交易可能已经发送，返回交易哈希
+            result["warning"] = "交易确认超时，请稍后查询交易状态"
+            return result
+        
+        if receipt.status != 1:
+            logger.error(f"❌ [BlockchainService] 交易失败: {tx_hash_hex}")
+            return {
+                "success": False,
+                "error": f"交易失败，交易哈希: {tx_hash_hex}",
+                "tx_hash": tx_hash_hex
             }
+        
+        logger.info(f"✅ [BlockchainService] 交易已确认: {tx_hash_hex}")
+        result.update({
+            "block_number": receipt.blockNumber,
+            "block_hash": receipt.blockHash.hex(),
+            "gas_used": receipt.gasUsed,
+            "message": f"交易信息已成功上链，交易哈希: {tx_hash_hex}"
+        })
+        return result
+    
+    def submit_transaction_on_chain(
+        self,
+        transaction_data: OnChainTransactionData,
+        to_address: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        将交易信息发送上链，不等待交易确认
+        
+        交易发送后立即返回，确认在后台线程中等待，调用方可以继续处理其他订单，
+        需要结果时通过 await_receipt(tx_hash) 获取交易收据。
+        
+        Args:
+            transaction_data: 上链交易数据对象
+            to_address: 接收地址（可选，如果提供则发送到该地址，否则发送到零地址）
             
-            logger.info(f"📝 [BlockchainService] 构建交易: from={from_address}, to={to_address}, data_hash={data_hash[:16]}...")
+        Returns:
+            包含交易哈希和数据哈希的字典（此时交易尚未确认）
+        """
+        result = self._submit_transaction(transaction_data, to_address)
+        result.pop("_receipt_future", None)
+        return result
+    
+    def await_receipt(self, tx_hash: str, timeout: Optional[float] = None) -> Any:
+        """
+        获取已发送交易的收据
+        
+        交易仍在后台等待确认时阻塞至确认完成；已确认（或不是由本服务发送）的交易直接从链上查询。
+        
+        Args:
+            tx_hash: 交易哈希
+            timeout: 最长等待时间（秒），None 表示等到后台确认结束
             
-            # 签名交易
-            signed_txn = self.web3.eth.account.sign_transaction(transaction, self.merchant_private_key)
+        Returns:
+            交易收据
+        """
+        future = self._pending.get(tx_hash)
+        if future is not None:
+            return future.result(timeout=timeout)
+        return self.web3.eth.get_transaction_receipt(tx_hash)
+    
+    def store_transaction_on_chain(
+        self,
+        transaction_data: OnChainTransactionData,
+        to_address: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        将交易信息存储到链上，并等待交易确认
+        
+        实现步骤：
+        1. 将订单数据序列化为 JSON
+        2. 计算数据哈希（SHA256）
+        3. 将哈希写入交易 input data（作为交易备注）
+        4. 获取交易哈希并返回
+        
+        使用交易 input data 存储数据哈希，通过交易哈希可以查询和验证数据。
+        不需要等待确认的调用方应使用 submit_transaction_on_chain。
+        
+        Args:
+            transaction_data: 上链交易数据对象
+            to_address: 接收地址（可选，如果提供则发送到该地址，否则发送到零地址）
             
-            # 步骤4: 发送交易并获取交易哈希
-            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            tx_hash_hex = tx_hash.hex()
+        Returns:
+            包含交易哈希和状态的字典
+        """
+        result = self._submit_transaction(transaction_data, to_address)
+        future = result.pop("_receipt_future", None)
+        if future is None:
+            return result
+        return self._wait_for_confirmation(result, future)
+    
+    def store_batch_on_chain(
+        self,
+        transactions: List[OnChainTransactionData],
+        to_address: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        批量上链：用一笔交易存储多笔订单数据的 Merkle 根，并等待交易确认
+        
+        每笔订单的数据哈希作为 Merkle 树的叶子，只有树根写入交易 input data，
+        N 笔订单只需一次发送和一次 gas。单笔订单之后可通过返回的 Merkle 证明验证：
+        verify_transaction_on_chain(tx_hash, expected_data, merkle_proof=proof)。
+        
+        Args:
+            transactions: 上链交易数据对象列表
+            to_address: 接收地址（可选，如果提供则发送到该地址，否则发送到零地址）
             
-            logger.info(f"✅ [BlockchainService] 步骤4: 交易已发送，交易哈希: {tx_hash_hex}")
+        Returns:
+            包含交易哈希、Merkle 根以及 订单ID -> Merkle 证明（十六进制字符串列表）的字典
+        """
+        if not transactions:
+            return {
+                "success": False,
+                "error": "没有需要上链的交易数据"
+            }
+        
+        try:
+            levels = _merkle_levels([t.calculate_digest() for t in transactions])
+            root = levels[-1][0]
+            logger.info(f"📊 [BlockchainService] 批量上链: {len(transactions)} 笔订单，Merkle 根: {root.hex()}")
             
-            # 等待交易确认（可选，可以异步处理）
-            try:
-                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-                if receipt.status == 1:
-                    logger.info(f"✅ [BlockchainService] 交易已确认: {tx_hash_hex}")
-                    return {
-                        "success": True,
-                        "tx_hash": tx_hash_hex,
-                        "block_number": receipt.blockNumber,
-                        "block_hash": receipt.blockHash.hex(),
-                        "data_hash": data_hash,
-                        "json_data": json_data,  # 包含原始JSON数据（用于验证）
-                        "transaction_data": transaction_data.to_dict(),
-                        "gas_used": receipt.gasUsed,
-                        "message": f"交易信息已成功上链，交易哈希: {tx_hash_hex}"
-                    }
-                else:
-                    logger.error(f"❌ [BlockchainService] 交易失败: {tx_hash_hex}")
-                    return {
-                        "success": False,
-                        "error": f"交易失败，交易哈希: {tx_hash_hex}",
-                        "tx_hash": tx_hash_hex
-                    }
-            except Exception as e:
-                logger.warning(f"⚠️ [BlockchainService] 等待交易确认超时: {e}")
-                # 即使超时，交易可能已经发送，返回交易哈希
-                return {
-                    "success": True,
-                    "tx_hash": tx_hash_hex,
-                    "data_hash": data_hash,
-                    "json_data": json_data,  # 包含原始JSON数据（用于验证）
-                    "transaction_data": transaction_data.to_dict(),
-                    "message": f"交易已发送，等待确认中，交易哈希: {tx_hash_hex}",
-                    "warning": "交易确认超时，请稍后查询交易状态"
-                }
+            sent = self._send_data_transaction(root, to_address)
+            if not sent["success"]:
+                return sent
+            future = sent.pop("_receipt_future")
+            tx_hash_hex = sent["tx_hash"]
             
+            result = {
+                "success": True,
+                "tx_hash": tx_hash_hex,
+                "merkle_root": root.hex(),
+                "order_count": len(transactions),
+                "proofs": {
+                    t.order_id: [node.hex() for node in _merkle_proof(levels, i)]
+                    for i, t in enumerate(transactions)
+                },
+                "message": f"交易已发送，等待确认中，交易哈希: {tx_hash_hex}"
+            }
         except Exception as e:
-            logger.error(f"❌ [BlockchainService] 上链失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [BlockchainService] 批量上链失败: {e}")
             return {
                 "success": False,
-                "error": f"上链失败: {str(e)}"
+                "error": f"批量上链失败: {str(e)}"
             }
+        
+        return self._wait_for_confirmation(result, future)
     
     def verify_transaction_on_chain(
         self,
         tx_hash: str,
-        expected_data: Optional[OnChainTransactionData] = None
+        expected_data: Optional[OnChainTransactionData] = None,
+        merkle_proof: Optional[List[Any]] = None
     ) -> Dict[str, Any]:
         """
         验证链上交易
@@ -296,13 +644,18 @@ class BlockchainService:
         Args:
             tx_hash: 交易哈希
             expected_data: 期望的交易数据（可选，如果提供则验证数据一致性）
+            merkle_proof: Merkle 证明（可选，验证批量上链交易中的单笔订单时提供，
+                          元素为 bytes 或十六进制字符串，来自 store_batch_on_chain 的返回）
             
         Returns:
             包含验证结果的字典
         """
         try:
-            # 检查连接
-            if not self.web3.is_connected():
+            # 已确认交易的收据和详情不会再变化，优先使用缓存
+            cached = self._tx_cache.get(tx_hash)
+            
+            # 检查连接（命中缓存时无需访问网络）
+            if cached is None and not self.web3.is_connected():
                 return {
                     "success": False,
                     "error": "无法连接到 IoTeX 网络"
@@ -311,31 +664,42 @@ class BlockchainService:
             logger.info(f"🔍 [BlockchainService] 开始验证交易: {tx_hash}")
             
             # 步骤1: 通过交易哈希查询链上数据
-            try:
-                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
-                logger.info(f"✅ [BlockchainService] 步骤1: 获取交易收据成功，区块号: {receipt.blockNumber}")
-            except Exception as e:
-                logger.error(f"❌ [BlockchainService] 无法获取交易收据: {str(e)}")
-                return {
-                    "success": False,
-                    "error": f"无法获取交易收据: {str(e)}"
-                }
-            
-            # 获取交易详情
-            try:
-                tx = self.web3.eth.get_transaction(tx_hash)
-                logger.info(f"✅ [BlockchainService] 获取交易详情成功")
-            except Exception as e:
-                logger.error(f"❌ [BlockchainService] 无法获取交易详情: {str(e)}")
-                return {
-                    "success": False,
-                    "error": f"无法获取交易详情: {str(e)}"
-                }
+            if cached is not None:
+                self._tx_cache.move_to_end(tx_hash)
+                receipt, tx = cached
+                logger.info(f"✅ [BlockchainService] 步骤1: 使用缓存的交易收据，区块号: {receipt.blockNumber}")
+            else:
+                try:
+                    receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+                    logger.info(f"✅ [BlockchainService] 步骤1: 获取交易收据成功，区块号: {receipt.blockNumber}")
+                except Exception as e:
+                    logger.error(f"❌ [BlockchainService] 无法获取交易收据: {str(e)}")
+                    return {
+                        "success": False,
+                        "error": f"无法获取交易收据: {str(e)}"
+                    }
+                
+                # 获取交易详情
+                try:
+                    tx = self.web3.eth.get_transaction(tx_hash)
+                    logger.info(f"✅ [BlockchainService] 获取交易详情成功")
+                except Exception as e:
+                    logger.error(f"❌ [BlockchainService] 无法获取交易详情: {str(e)}")
+                    return {
+                        "success": False,
+                        "error": f"无法获取交易详情: {str(e)}"
+                    }
+                
+                self._tx_cache[tx_hash] = (receipt, tx)
+                if len(self._tx_cache) > TX_CACHE_SIZE:
+                    self._tx_cache.popitem(last=False)
             
-            # 步骤2: 提取交易 input data 中的数据哈希
-            input_data = tx.input.hex() if tx.input else ""
+            # 步骤2: 提取交易 input data 中的数据哈希（直接按字节处理）
+            raw_input = tx.input or b""
+            if isinstance(raw_input, str):
+                raw_input = bytes.fromhex(raw_input[2:] if raw_input.startswith("0x") else raw_input)
             
-            if not input_data:
+            if not raw_input:
                 logger.warning(f"⚠️ [BlockchainService] 交易 input data 为空")
                 return {
                     "success": True,
@@ -345,28 +709,36 @@ class BlockchainService:
                     "error": "交易 input data 为空，无法提取数据哈希"
                 }
             
-            logger.info(f"📊 [BlockchainService] 步骤2: 提取 input data，长度: {len(input_data)} 字符")
+            logger.info(f"📊 [BlockchainService] 步骤2: 提取 input data，长度: {len(raw_input)} 字节")
             
             # 从 input data 中提取数据哈希
-            # input data 应该是32字节（64个十六进制字符）的哈希
+            # input data 应该是32字节的哈希
+            stored_digest = None
             stored_hash = None
-            if len(input_data) >= 64:
-                # 如果是数据存储交易，input data 应该直接是数据哈希（64个字符）
-                # 如果包含函数选择器，取后64个字符
-                stored_hash = input_data[-64:] if len(input_data) > 64 else input_data
+            if len(raw_input) >= 32:
+                # 如果是数据存储交易，input data 应该直接是数据哈希（32字节）
+                # 如果包含函数选择器，取后32字节
+                stored_digest = bytes(raw_input[-32:])
+                stored_hash = stored_digest.hex()
                 logger.info(f"📊 [BlockchainService] 提取的数据哈希: {stored_hash}")
             else:
-                logger.warning(f"⚠️ [BlockchainService] input data 长度不足: {len(input_data)} 字符，预期至少64字符")
+                logger.warning(f"⚠️ [BlockchainService] input data 长度不足: {len(raw_input)} 字节，预期至少32字节")
             
             # 步骤3: 如果提供期望数据，验证数据完整性
             if expected_data:
-                # 计算期望数据的哈希
-                expected_hash = expected_data.calculate_hash()
+                # 计算期望数据的哈希（提供 Merkle 证明时，期望值为由证明推算出的树根）
+                expected_digest = expected_data.calculate_digest()
+                if merkle_proof:
+                    expected_digest = _merkle_root_from_proof(expected_digest, [
+                        node if isinstance(node, bytes) else bytes.fromhex(node.removeprefix("0x"))
+                        for node in merkle_proof
+                    ])
+                expected_hash = expected_digest.hex()
                 logger.info(f"📊 [BlockchainService] 步骤3: 计算期望数据哈希: {expected_hash}")
                 
-                if stored_hash:
-                    # 比较哈希（不区分大小写）
-                    if stored_hash.lower() == expected_hash.lower():
+                if stored_digest:
+                    # 直接比较哈希原始字节
+                    if stored_digest == expected_digest:
                         logger.info(f"✅ [BlockchainService] 数据验证成功，哈希匹配")
                         return {
                             "success": True,
@@ -380,6 +752,8 @@ class BlockchainService:
                         }
                     else:
                         logger.warning(f"⚠️ [BlockchainService] 数据验证失败，哈希不匹配")
+                        # 验证失败时丢弃缓存（可能发生了链重组），下次重新查询
+                        self._tx_cache.pop(tx_hash, None)
                         logger.warning(f"   存储哈希: {stored_hash}")
                         logger.warning(f"   期望哈希: {expected_hash}")
                         return {
@@ -393,6 +767,7 @@ class BlockchainService:
                             "error": "数据验证失败，链上数据与预期数据不一致，数据完整性验证失败"
                         }
                 else:
+                    self._tx_cache.pop(tx_hash, None)
                     return {
                         "success": True,
                         "verified": False,
@@ -403,6 +778,7 @@ class BlockchainService:
             
             # 如果没有提供期望数据，只返回交易信息（不进行完整性验证）
             logger.info(f"ℹ️ [BlockchainService] 未提供期望数据，仅返回交易信息")
+            input_data = tx.input if isinstance(tx.input, str) else tx.input.hex()
             return {
                 "success": True,
                 "verified": None,
@@ -420,9 +796,7 @@ class BlockchainService:
             }
             
         except Exception as e:
-            logger.error(f"❌ [BlockchainService] 验证交易失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ [BlockchainService] 验证交易失败: {e}")
             return {
                 "success": False,
                 "error": f"验证交易失败: {str(e)}"
@@ -458,22 +832,12 @@ class BlockchainService:
         # 构建商品信息
         product_info = {}
         if order.product_info:
-            product_info = {
-                "product_id": getattr(order.product_info, 'product_id', ''),
-                "product_name": getattr(order.product_info, 'product_name', ''),
-                "quantity": getattr(order.product_info, 'quantity', 1),
-                "unit_price": getattr(order.product_info, 'unit_price', 0.0)
-            }
+            product_info = _read_fields(order.product_info, _PRODUCT_FIELDS)
         
         # 构建交付信息
         delivery_info = {}
         if order.delivery_info:
-            delivery_info = {
-                "delivery_method": getattr(order.delivery_info, 'delivery_method', ''),
-                "tracking_number": getattr(order.delivery_info, 'tracking_number', ''),
-                "carrier": getattr(order.delivery_info, 'carrier', ''),
-                "actual_delivery_date": getattr(order.delivery_info, 'actual_delivery_date', '')
-            }
+            delivery_info = _read_fields(order.delivery_info, _DELIVERY_FIELDS)
         
         # 确定时间戳
         timestamp = order.delivered_at if order.delivered_at else order.accepted_at
@@ -489,10 +853,14 @@ class BlockchainService:
             payment_tx_hash=payment_tx_hash or '',
             delivery_tx_hash=delivery_tx_hash,
             status=status,
-            timestamp=timestamp or datetime.now().isoformat(),
+            timestamp=timestamp or _now_iso(),
             product_info=product_info,
             delivery_info=delivery_info
         )
+    
+    def close(self) -> None:
+        """关闭等待交易收据的后台线程池（不等待尚未确认的交易）"""
+        self._receipt_executor.shutdown(wait=False)
 
 
 # ==============================================================================
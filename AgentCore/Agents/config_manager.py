@@ -9,13 +9,75 @@ from typing import Dict, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+# .env 配置模板（export_config_template 导出的内容）
+_CONFIG_TEMPLATE = """# 系统配置
+ENVIRONMENT=development
+LOG_LEVEL=INFO
+ENABLE_METRICS=false
+ENABLE_TRACING=false
+
+# 服务端口配置
+USER_AGENT_PORT=5011
+PAYMENT_AGENT_PORT=5005  # Alipay Agent 端口
+WECHAT_PAY_AGENT_PORT=5006  # WeChat Pay Agent 端口
+AMAZON_AGENT_PORT=5012
+REGISTRY_PORT=5001
+
+# 支付配置
+PAYMENT_MODE=mock  # mock, real, hybrid
+
+# 支付宝配置
+ALIPAY_APP_ID=your_app_id_here
+ALIPAY_PRIVATE_KEY_PATH=./keys/app_private_key.pem
+ALIPAY_PUBLIC_KEY_PATH=./keys/alipay_public_key.pem
+ALIPAY_GATEWAY=https://openapi.alipay.com/gateway.do
+ALIPAY_SANDBOX=true
+
+# 微信支付配置
+WECHAT_PAY_ENABLED=false  # 是否启用微信支付
+WECHAT_APP_ID=your_wechat_app_id
+WECHAT_MCH_ID=your_merchant_id
+WECHAT_API_KEY=your_wechat_api_key
+WECHAT_APP_SECRET=your_wechat_app_secret  # 可选
+WECHAT_CERT_PATH=./certs/apiclient_cert.pem  # 可选
+WECHAT_KEY_PATH=./certs/apiclient_key.pem  # 可选
+WECHAT_NOTIFY_URL=http://localhost:5006/wechat-pay/notify
+WECHAT_SANDBOX=true
+
+# Amazon配置
+AMAZON_MODE=mock  # mock, real, hybrid
+AMAZON_SP_API_REFRESH_TOKEN=your_refresh_token
+AMAZON_SP_API_CLIENT_ID=your_client_id
+AMAZON_SP_API_CLIENT_SECRET=your_client_secret
+AMAZON_MARKETPLACE_ID=ATVPDKIKX0DER
+AMAZON_REGION=us-east-1
+AMAZON_SANDBOX=true
+
+# AWS配置（Amazon SP-API需要）
+AWS_ACCESS_KEY_ID=your_aws_access_key
+AWS_SECRET_ACCESS_KEY=your_aws_secret_key
+AWS_ROLE_ARN=your_aws_role_arn
+
+# RapidAPI配置（商品搜索）
+RAPIDAPI_KEY=your_rapidapi_key
+RAPIDAPI_HOST=real-time-amazon-data.p.rapidapi.com
+"""
+
+def _path_ok(path: str) -> bool:
+    """检查路径是否存在（单次 stat 调用）"""
+    try:
+        os.stat(path)
+    except (OSError, ValueError):
+        return False
+    return True
+
 class OperationMode(Enum):
     """操作模式枚举"""
     MOCK = "mock"
     REAL = "real"
     HYBRID = "hybrid"  # 混合模式：部分真实，部分模拟
 
-@dataclass
+@dataclass(slots=True)
 class PaymentConfig:
     """支付配置"""
     mode: OperationMode
@@ -39,7 +101,7 @@ class PaymentConfig:
     # 其他支付方式配置
     stripe_enabled: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class AmazonConfig:
     """Amazon配置"""
     mode: OperationMode
@@ -65,7 +127,7 @@ class AmazonConfig:
     max_retry_attempts: int = 3
     request_timeout: int = 30
 
-@dataclass
+@dataclass(slots=True)
 class SystemConfig:
     """系统配置"""
     environment: str = "development"  # development, staging, production
@@ -80,6 +142,54 @@ class SystemConfig:
     amazon_agent_port: int = 5012
     registry_port: int = 5001
 
+def _to_bool(value: str) -> bool:
+    """将环境变量字符串转换为布尔值"""
+    return value.lower() == 'true'
+
+# 环境变量声明表：(字段名, 环境变量名, 默认值, 转换函数)
+_PAYMENT_SPEC = (
+    ('alipay_app_id', 'ALIPAY_APP_ID', '', str),
+    ('alipay_private_key_path', 'ALIPAY_PRIVATE_KEY_PATH', '', str),
+    ('alipay_public_key_path', 'ALIPAY_PUBLIC_KEY_PATH', '', str),
+    ('alipay_gateway', 'ALIPAY_GATEWAY', 'https://openapi.alipay.com/gateway.do', str),
+    ('alipay_sandbox', 'ALIPAY_SANDBOX', 'true', _to_bool),
+    ('wechat_pay_enabled', 'WECHAT_PAY_ENABLED', 'false', _to_bool),
+    ('wechat_app_id', 'WECHAT_APP_ID', '', str),
+    ('wechat_mch_id', 'WECHAT_MCH_ID', '', str),
+    ('wechat_api_key', 'WECHAT_API_KEY', '', str),
+    ('wechat_app_secret', 'WECHAT_APP_SECRET', '', str),
+    ('wechat_cert_path', 'WECHAT_CERT_PATH', '', str),
+    ('wechat_key_path', 'WECHAT_KEY_PATH', '', str),
+    ('wechat_notify_url', 'WECHAT_NOTIFY_URL', '', str),
+    ('wechat_sandbox', 'WECHAT_SANDBOX', 'true', _to_bool),
+)
+
+_AMAZON_SPEC = (
+    ('sp_api_refresh_token', 'AMAZON_SP_API_REFRESH_TOKEN', '', str),
+    ('sp_api_client_id', 'AMAZON_SP_API_CLIENT_ID', '', str),
+    ('sp_api_client_secret', 'AMAZON_SP_API_CLIENT_SECRET', '', str),
+    ('marketplace_id', 'AMAZON_MARKETPLACE_ID', 'ATVPDKIKX0DER', str),
+    ('region', 'AMAZON_REGION', 'us-east-1', str),
+    ('aws_access_key_id', 'AWS_ACCESS_KEY_ID', '', str),
+    ('aws_secret_access_key', 'AWS_SECRET_ACCESS_KEY', '', str),
+    ('aws_role_arn', 'AWS_ROLE_ARN', '', str),
+    ('rapidapi_key', 'RAPIDAPI_KEY', '', str),
+    ('rapidapi_host', 'RAPIDAPI_HOST', 'real-time-amazon-data.p.rapidapi.com', str),
+    ('sandbox', 'AMAZON_SANDBOX', 'true', _to_bool),
+)
+
+_SYSTEM_SPEC = (
+    ('environment', 'ENVIRONMENT', 'development', str),
+    ('log_level', 'LOG_LEVEL', 'INFO', str),
+    ('enable_metrics', 'ENABLE_METRICS', 'false', _to_bool),
+    ('enable_tracing', 'ENABLE_TRACING', 'false', _to_bool),
+    ('user_agent_port', 'USER_AGENT_PORT', '5011', int),
+    ('payment_agent_port', 'PAYMENT_AGENT_PORT', '5005', int),
+    ('wechat_pay_agent_port', 'WECHAT_PAY_AGENT_PORT', '5006', int),
+    ('amazon_agent_port', 'AMAZON_AGENT_PORT', '5012', int),
+    ('registry_port', 'REGISTRY_PORT', '5001', int),
+)
+
 class ConfigManager:
     """配置管理器"""
     
@@ -89,107 +199,86 @@ class ConfigManager:
     
     def _load_config(self):
         """加载配置"""
-        # 从环境变量加载
-        self.payment_config = PaymentConfig(
-            mode=OperationMode(os.getenv('PAYMENT_MODE', 'mock')),
-            alipay_app_id=os.getenv('ALIPAY_APP_ID', ''),
-            alipay_private_key_path=os.getenv('ALIPAY_PRIVATE_KEY_PATH', ''),
-            alipay_public_key_path=os.getenv('ALIPAY_PUBLIC_KEY_PATH', ''),
-            alipay_gateway=os.getenv('ALIPAY_GATEWAY', 'https://openapi.alipay.com/gateway.do'),
-            alipay_sandbox=os.getenv('ALIPAY_SANDBOX', 'true').lower() == 'true',
-            wechat_pay_enabled=os.getenv('WECHAT_PAY_ENABLED', 'false').lower() == 'true',
-            wechat_app_id=os.getenv('WECHAT_APP_ID', ''),
-            wechat_mch_id=os.getenv('WECHAT_MCH_ID', ''),
-            wechat_api_key=os.getenv('WECHAT_API_KEY', ''),
-            wechat_app_secret=os.getenv('WECHAT_APP_SECRET', ''),
-            wechat_cert_path=os.getenv('WECHAT_CERT_PATH', ''),
-            wechat_key_path=os.getenv('WECHAT_KEY_PATH', ''),
-            wechat_notify_url=os.getenv('WECHAT_NOTIFY_URL', ''),
-            wechat_sandbox=os.getenv('WECHAT_SANDBOX', 'true').lower() == 'true'
-        )
+        # 从环境变量加载（按声明表逐项读取并转换）
+        get = os.environ.get
+
+        def _build(spec):
+            return {name: conv(get(key, default)) for name, key, default, conv in spec}
+
+        payment_kw = _build(_PAYMENT_SPEC)
+        payment_kw['mode'] = OperationMode(get('PAYMENT_MODE', 'mock'))
+        self.payment_config = PaymentConfig(**payment_kw)
         
-        self.amazon_config = AmazonConfig(
-            mode=OperationMode(os.getenv('AMAZON_MODE', 'mock')),
-            sp_api_refresh_token=os.getenv('AMAZON_SP_API_REFRESH_TOKEN', ''),
-            sp_api_client_id=os.getenv('AMAZON_SP_API_CLIENT_ID', ''),
-            sp_api_client_secret=os.getenv('AMAZON_SP_API_CLIENT_SECRET', ''),
-            marketplace_id=os.getenv('AMAZON_MARKETPLACE_ID', 'ATVPDKIKX0DER'),
-            region=os.getenv('AMAZON_REGION', 'us-east-1'),
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID', ''),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', ''),
-            aws_role_arn=os.getenv('AWS_ROLE_ARN', ''),
-            rapidapi_key=os.getenv('RAPIDAPI_KEY', ''),
-            rapidapi_host=os.getenv('RAPIDAPI_HOST', 'real-time-amazon-data.p.rapidapi.com'),
-            sandbox=os.getenv('AMAZON_SANDBOX', 'true').lower() == 'true'
-        )
+        amazon_kw = _build(_AMAZON_SPEC)
+        amazon_kw['mode'] = OperationMode(get('AMAZON_MODE', 'mock'))
+        self.amazon_config = AmazonConfig(**amazon_kw)
         
-        self.system_config = SystemConfig(
-            environment=os.getenv('ENVIRONMENT', 'development'),
-            log_level=os.getenv('LOG_LEVEL', 'INFO'),
-            enable_metrics=os.getenv('ENABLE_METRICS', 'false').lower() == 'true',
-            enable_tracing=os.getenv('ENABLE_TRACING', 'false').lower() == 'true',
-            user_agent_port=int(os.getenv('USER_AGENT_PORT', '5011')),
-            payment_agent_port=int(os.getenv('PAYMENT_AGENT_PORT', '5005')),
-            wechat_pay_agent_port=int(os.getenv('WECHAT_PAY_AGENT_PORT', '5006')),
-            amazon_agent_port=int(os.getenv('AMAZON_AGENT_PORT', '5012')),
-            registry_port=int(os.getenv('REGISTRY_PORT', '5001'))
-        )
+        self.system_config = SystemConfig(**_build(_SYSTEM_SPEC))
+        
+        # 配置加载后不再变化，预先计算模式判断结果
+        self._is_payment_real = self.payment_config.mode is OperationMode.REAL
+        self._is_amazon_real = self.amazon_config.mode is OperationMode.REAL
+        self._is_production = self.system_config.environment == "production"
+        self._service_urls: Optional[Dict[str, str]] = None
     
     def is_payment_real(self) -> bool:
         """检查支付是否为真实模式"""
-        return self.payment_config.mode == OperationMode.REAL
+        return self._is_payment_real
     
     def is_amazon_real(self) -> bool:
         """检查Amazon是否为真实模式"""
-        return self.amazon_config.mode == OperationMode.REAL
+        return self._is_amazon_real
     
     def is_production(self) -> bool:
         """检查是否为生产环境"""
-        return self.system_config.environment == "production"
+        return self._is_production
     
     def validate_config(self) -> Dict[str, Any]:
         """验证配置完整性"""
         issues = []
+        payment = self.payment_config
+        amazon = self.amazon_config
+        payment_real = self._is_payment_real
+        wechat_on = payment.wechat_pay_enabled
         
         # 验证支付配置
-        if self.is_payment_real():
-            if not self.payment_config.alipay_app_id:
+        if payment_real:
+            if not payment.alipay_app_id:
                 issues.append("支付宝APP_ID未配置")
-            if not self.payment_config.alipay_private_key_path:
+            if not payment.alipay_private_key_path:
                 issues.append("支付宝私钥路径未配置")
-            if not os.path.exists(self.payment_config.alipay_private_key_path):
+            if not _path_ok(payment.alipay_private_key_path):
                 issues.append("支付宝私钥文件不存在")
         
         # 验证微信支付配置（如果启用）
-        if self.payment_config.wechat_pay_enabled:
-            if self.is_payment_real():
-                if not self.payment_config.wechat_app_id:
-                    issues.append("微信支付APP_ID未配置")
-                if not self.payment_config.wechat_mch_id:
-                    issues.append("微信支付商户号(MCH_ID)未配置")
-                if not self.payment_config.wechat_api_key:
-                    issues.append("微信支付API_KEY未配置")
-                if self.payment_config.wechat_cert_path and not os.path.exists(self.payment_config.wechat_cert_path):
-                    issues.append("微信支付证书文件不存在")
-                if self.payment_config.wechat_key_path and not os.path.exists(self.payment_config.wechat_key_path):
-                    issues.append("微信支付私钥文件不存在")
+        if wechat_on and payment_real:
+            if not payment.wechat_app_id:
+                issues.append("微信支付APP_ID未配置")
+            if not payment.wechat_mch_id:
+                issues.append("微信支付商户号(MCH_ID)未配置")
+            if not payment.wechat_api_key:
+                issues.append("微信支付API_KEY未配置")
+            if payment.wechat_cert_path and not _path_ok(payment.wechat_cert_path):
+                issues.append("微信支付证书文件不存在")
+            if payment.wechat_key_path and not _path_ok(payment.wechat_key_path):
+                issues.append("微信支付私钥文件不存在")
         
         # 验证Amazon配置
-        if self.is_amazon_real():
-            if not self.amazon_config.sp_api_refresh_token:
+        if self._is_amazon_real:
+            if not amazon.sp_api_refresh_token:
                 issues.append("Amazon SP-API refresh token未配置")
-            if not self.amazon_config.sp_api_client_id:
+            if not amazon.sp_api_client_id:
                 issues.append("Amazon SP-API client ID未配置")
-            if not self.amazon_config.aws_access_key_id:
+            if not amazon.aws_access_key_id:
                 issues.append("AWS access key未配置")
         
         # 验证生产环境配置
-        if self.is_production():
-            if self.payment_config.alipay_sandbox:
+        if self._is_production:
+            if payment.alipay_sandbox:
                 issues.append("生产环境不应使用支付宝沙箱")
-            if self.payment_config.wechat_pay_enabled and self.payment_config.wechat_sandbox:
+            if wechat_on and payment.wechat_sandbox:
                 issues.append("生产环境不应使用微信支付沙箱")
-            if self.amazon_config.sandbox:
+            if amazon.sandbox:
                 issues.append("生产环境不应使用Amazon沙箱")
         
         return {
@@ -198,90 +287,49 @@ class ConfigManager:
         }
     
     def get_service_urls(self) -> Dict[str, str]:
-        """获取服务URL配置"""
-        urls = {
-            "user_agent": f"http://localhost:{self.system_config.user_agent_port}",
-            "payment_agent": f"http://localhost:{self.system_config.payment_agent_port}",
-            "amazon_agent": f"http://localhost:{self.system_config.amazon_agent_port}",
-            "registry": f"http://localhost:{self.system_config.registry_port}"
-        }
-        # 如果微信支付启用，添加微信支付Agent URL
-        if self.payment_config.wechat_pay_enabled:
-            urls["wechat_pay_agent"] = f"http://localhost:{self.system_config.wechat_pay_agent_port}"
-        return urls
+        """获取服务URL配置（端口在加载后不变，URL缓存后每次返回副本，调用方可自由修改）"""
+        if self._service_urls is None:
+            system = self.system_config
+            urls = {
+                "user_agent": f"http://localhost:{system.user_agent_port}",
+                "payment_agent": f"http://localhost:{system.payment_agent_port}",
+                "amazon_agent": f"http://localhost:{system.amazon_agent_port}",
+                "registry": f"http://localhost:{system.registry_port}"
+            }
+            # 如果微信支付启用，添加微信支付Agent URL
+            if self.payment_config.wechat_pay_enabled:
+                urls["wechat_pay_agent"] = f"http://localhost:{system.wechat_pay_agent_port}"
+            self._service_urls = urls
+        return dict(self._service_urls)
     
     def export_config_template(self, file_path: str = ".env.template"):
         """导出配置模板"""
-        template = """# 系统配置
-ENVIRONMENT=development
-LOG_LEVEL=INFO
-ENABLE_METRICS=false
-ENABLE_TRACING=false
-
-# 服务端口配置
-USER_AGENT_PORT=5011
-PAYMENT_AGENT_PORT=5005  # Alipay Agent 端口
-WECHAT_PAY_AGENT_PORT=5006  # WeChat Pay Agent 端口
-AMAZON_AGENT_PORT=5012
-REGISTRY_PORT=5001
-
-# 支付配置
-PAYMENT_MODE=mock  # mock, real, hybrid
-
-# 支付宝配置
-ALIPAY_APP_ID=your_app_id_here
-ALIPAY_PRIVATE_KEY_PATH=./keys/app_private_key.pem
-ALIPAY_PUBLIC_KEY_PATH=./keys/alipay_public_key.pem
-ALIPAY_GATEWAY=https://openapi.alipay.com/gateway.do
-ALIPAY_SANDBOX=true
-
-# 微信支付配置
-WECHAT_PAY_ENABLED=false  # 是否启用微信支付
-WECHAT_APP_ID=your_wechat_app_id
-WECHAT_MCH_ID=your_merchant_id
-WECHAT_API_KEY=your_wechat_api_key
-WECHAT_APP_SECRET=your_wechat_app_secret  # 可选
-WECHAT_CERT_PATH=./certs/apiclient_cert.pem  # 可选
-WECHAT_KEY_PATH=./certs/apiclient_key.pem  # 可选
-WECHAT_NOTIFY_URL=http://localhost:5006/wechat-pay/notify
-WECHAT_SANDBOX=true
-
-# Amazon配置
-AMAZON_MODE=mock  # mock, real, hybrid
-AMAZON_SP_API_REFRESH_TOKEN=your_refresh_token
-AMAZON_SP_API_CLIENT_ID=your_client_id
-AMAZON_SP_API_CLIENT_SECRET=your_client_secret
-AMAZON_MARKETPLACE_ID=ATVPDKIKX0DER
-AMAZON_REGION=us-east-1
-AMAZON_SANDBOX=true
-
-# AWS配置（Amazon SP-API需要）
-AWS_ACCESS_KEY_ID=your_aws_access_key
-AWS_SECRET_ACCESS_KEY=your_aws_secret_key
-AWS_ROLE_ARN=your_aws_role_arn
-
-# RapidAPI配置（商品搜索）
-RAPIDAPI_KEY=your_rapidapi_key
-RAPIDAPI_HOST=real-time-amazon-data.p.rapidapi.com
-"""
-        
         with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(template)
+            f.write(_CONFIG_TEMPLATE)
         
         print(f"✅ 配置模板已导出到: {file_path}")
 
-# 全局配置实例
-config = ConfigManager()
+# 全局配置实例（首次访问时才构建，见 get_config / 模块级 __getattr__）
+_config_singleton: Optional[ConfigManager] = None
 
 def get_config() -> ConfigManager:
     """获取全局配置实例"""
-    return config
+    global _config_singleton
+    if _config_singleton is None:
+        _config_singleton = ConfigManager()
+    return _config_singleton
+
+def __getattr__(name: str):
+    """延迟提供模块属性 config，避免导入时就读取环境变量"""
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 配置验证装饰器
 def require_real_payment(func):
     """装饰器：要求真实支付模式"""
     def wrapper(*args, **kwargs):
-        if not config.is_payment_real():
+        if not get_config().is_payment_real():
             raise ValueError("此功能需要真实支付模式")
         return func(*args, **kwargs)
     return wrapper
@@ -289,7 +337,7 @@ def require_real_payment(func):
 def require_real_amazon(func):
     """装饰器：要求真实Amazon模式"""
     def wrapper(*args, **kwargs):
-        if not config.is_amazon_real():
+        if not get_config().is_amazon_real():
             raise ValueError("此功能需要真实Amazon模式")
         return func(*args, **kwargs)
     return wrapper
@@ -5,11 +5,15 @@
 
 import asyncio
 import logging
+import random
+import time
 from typing import Any, Callable, Dict, Optional, Type
 from functools import wraps
-from datetime import datetime, timedelta
+from datetime import datetime
 import traceback
 
+logger = logging.getLogger(__name__)
+
 class RetryConfig:
     """重试配置"""
     def __init__(
@@ -46,42 +50,46 @@ class NetworkError(Exception):
         super().__init__(message)
         self.retryable = retryable
 
+# 可重试的错误代码
+_RETRYABLE_ERRORS = frozenset({
+    # 网络错误
+    'ConnectionError',
+    'TimeoutError',
+    'HTTPError',
+    
+    # 支付宝错误
+    'SYSTEM_ERROR',
+    'UNKNOW_ERROR',
+    'ACQ.SYSTEM_ERROR',
+    
+    # Amazon错误
+    'RequestThrottled',
+    'ServiceUnavailable',
+    'InternalFailure'
+})
+
+# 不可重试的错误代码
+_NON_RETRYABLE_ERRORS = frozenset({
+    # 支付宝错误
+    'ACQ.INVALID_PARAMETER',
+    'ACQ.ACCESS_FORBIDDEN',
+    'ACQ.TRADE_NOT_EXIST',
+    
+    # Amazon错误
+    'InvalidParameterValue',
+    'AccessDenied',
+    'InvalidAccessKeyId'
+})
+
 class ErrorHandler:
     """错误处理器"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
-        # 错误分类映射
-        self.retryable_errors = {
-            # 网络错误
-            'ConnectionError',
-            'TimeoutError',
-            'HTTPError',
-            
-            # 支付宝错误
-            'SYSTEM_ERROR',
-            'UNKNOW_ERROR',
-            'ACQ.SYSTEM_ERROR',
-            
-            # Amazon错误
-            'RequestThrottled',
-            'ServiceUnavailable',
-            'InternalFailure'
-        }
-        
-        # 不可重试的错误
-        self.non_retryable_errors = {
-            # 支付宝错误
-            'ACQ.INVALID_PARAMETER',
-            'ACQ.ACCESS_FORBIDDEN',
-            'ACQ.TRADE_NOT_EXIST',
-            
-            # Amazon错误
-            'InvalidParameterValue',
-            'AccessDenied',
-            'InvalidAccessKeyId'
-        }
+        # 错误分类映射（默认共享模块级常量，可按实例替换）
+        self.retryable_errors = _RETRYABLE_ERRORS
+        self.non_retryable_errors = _NON_RETRYABLE_ERRORS
     
     def is_retryable(self, error: Exception) -> bool:
         """判断错误是否可重试"""
@@ -140,6 +148,9 @@ class ErrorHandler:
             "timestamp": datetime.now().isoformat()
         }
 
+# 共享的错误处理器（无状态，可被所有重试包装器复用）
+_SHARED_HANDLER = ErrorHandler()
+
 def retry_with_backoff(
     config: RetryConfig = None,
     exceptions: tuple = (Exception,),
@@ -150,9 +161,15 @@ def retry_with_backoff(
         config = RetryConfig()
     
     def decorator(func):
+        # 预先计算每次重试的退避延迟（抖动在使用时再乘上）
+        _delays = tuple(
+            min(config.base_delay * (config.exponential_base ** i), config.max_delay)
+            for i in range(config.max_attempts)
+        )
+        error_handler = _SHARED_HANDLER
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            error_handler = ErrorHandler()
             last_exception = None
             
             for attempt in range(config.max_attempts):
@@ -161,31 +178,28 @@ def retry_with_backoff(
                 
                 except exceptions as e:
                     last_exception = e
-                    error_info = error_handler.categorize_error(e)
+                    error_msg = str(e)
                     
                     # 记录错误
-                    logging.warning(
-                        f"Attempt {attempt + 1}/{config.max_attempts} failed: {error_info['message']}"
+                    logger.warning(
+                        "Attempt %d/%d failed: %s",
+                        attempt + 1, config.max_attempts, error_msg
                     )
                     
                     # 检查是否可重试
                     if not error_handler.is_retryable(e):
-                        logging.error(f"Non-retryable error: {error_info['message']}")
+                        logger.error("Non-retryable error: %s", error_msg)
                         raise e
                     
                     # 最后一次尝试失败
                     if attempt == config.max_attempts - 1:
-                        logging.error(f"All {config.max_attempts} attempts failed")
+                        logger.error("All %d attempts failed", config.max_attempts)
                         raise e
                     
                     # 计算延迟时间
-                    delay = min(
-                        config.base_delay * (config.exponential_base ** attempt),
-                        config.max_delay
-                    )
+                    delay = _delays[attempt]
                     
                     if config.jitter:
-                        import random
                         delay *= (0.5 + random.random() * 0.5)
                     
                     # 调用重试回调
@@ -199,7 +213,6 @@ def retry_with_backoff(
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            error_handler = ErrorHandler()
             last_exception = None
             
             for attempt in range(config.max_attempts):
@@ -208,30 +221,26 @@ def retry_with_backoff(
                 
                 except exceptions as e:
                     last_exception = e
-                    error_info = error_handler.categorize_error(e)
+                    error_msg = str(e)
                     
-                    logging.warning(
-                        f"Attempt {attempt + 1}/{config.max_attempts} failed: {error_info['message']}"
+                    logger.warning(
+                        "Attempt %d/%d failed: %s",
+                        attempt + 1, config.max_attempts, error_msg
                     )
                     
                     if not error_handler.is_retryable(e):
-                        logging.error(f"Non-retryable error: {error_info['message']}")
+                        logger.error("Non-retryable error: %s", error_msg)
                         raise e
                     
                     if attempt == config.max_attempts - 1:
-                        logging.error(f"All {config.max_attempts} attempts failed")
+                        logger.error("All %d attempts failed", config.max_attempts)
                         raise e
                     
-                    delay = min(
-                        config.base_delay * (config.exponential_base ** attempt),
-                        config.max_delay
-                    )
+                    delay = _delays[attempt]
                     
                     if config.jitter:
-                        import random
                         delay *= (0.5 + random.random() * 0.5)
                     
-                    import time
                     time.sleep(delay)
             
             raise last_exception
@@ -259,6 +268,8 @@ class CircuitBreaker:
         
         self.failure_count = 0
         self.last_failure_time = None
+        # 最近一次失败的 time.monotonic() 时间戳，仅用于判断是否到达恢复时间
+        self._last_failure_mono: Optional[float] = None
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
     
     def __call__(self, func):
@@ -304,8 +315,8 @@ class CircuitBreaker:
     def _should_attempt_reset(self) -> bool:
         """检查是否应该尝试重置"""
         return (
-            self.last_failure_time and
-            datetime.now() - self.last_failure_time > timedelta(seconds=self.recovery_timeout)
+            self._last_failure_mono is not None and
+            time.monotonic() - self._last_failure_mono > self.recovery_timeout
         )
     
     def _on_success(self):
@@ -317,6 +328,7 @@ class CircuitBreaker:
         """失败时的处理"""
         self.failure_count += 1
         self.last_failure_time = datetime.now()
+        self._last_failure_mono = time.monotonic()
         
         if self.failure_count >= self.failure_threshold:
             self.state = "OPEN"
@@ -332,7 +344,6 @@ if __name__ == "__main__":
     @retry_with_backoff(config=retry_config, exceptions=(PaymentError, NetworkError))
     async def mock_payment_call():
         """模拟支付调用"""
-        import random
         if random.random() < 0.7:  # 70% 失败率
             raise PaymentError("支付服务暂时不可用", "SYSTEM_ERROR", retryable=True)
         return {"success": True, "order_id": "12345"}
@@ -340,7 +351,6 @@ if __name__ == "__main__":
     @CircuitBreaker(failure_threshold=3, recovery_timeout=30)
     async def mock_amazon_call():
         """模拟Amazon调用"""
-        import random
         if random.random() < 0.8:  # 80% 失败率
             raise AmazonAPIError("Amazon API限流", "RequestThrottled", retryable=True)
         return {"success": True, "products": []}
@@ -2054,6 +2054,11 @@ class MerchantAgent(A2AServer):
                 "success": False,
                 "error": f"上链处理异常: {str(e)}"
             }
+    
+    def shutdown(self):
+        """关闭服务器：释放区块链服务的后台线程池"""
+        if self.blockchain_service is not None:
+            self.blockchain_service.close()
 
 
 def main():
@@ -2092,7 +2097,10 @@ def main():
     print("   - A2A协议兼容")
     print("="*60 + "\n")
     
-    run_server(server, host="0.0.0.0", port=port)
+    try:
+        run_server(server, host="0.0.0.0", port=port)
+    finally:
+        server.shutdown()
 
 
 if __name__ == "__main__":
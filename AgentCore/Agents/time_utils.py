@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+时间工具 - 各Agent共用的时间戳格式化
+"""
+
+import time
+from datetime import datetime
+
+# 最近一次格式化结果 (秒级时间戳, ISO字符串)，整体替换保证多线程读取时两者一致
+_now_cache = (0, '')
+
+
+def now_iso() -> str:
+    """
+    返回当前时间的ISO字符串，同一秒内复用已格式化的结果
+    
+    结果精确到秒、不含微秒（如 2026-10-15T22:52:02），与 datetime.now().isoformat() 的输出格式不同
+    """
+    global _now_cache
+    t = int(time.time())
+    cached_t, cached_s = _now_cache
+    if cached_t == t:
+        return cached_s
+    s = datetime.fromtimestamp(t).isoformat()
+    _now_cache = (t, s)
+    return s
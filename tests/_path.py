@@ -0,0 +1,9 @@
+"""
+测试路径设置 - 让 AgentCore/Agents 下的模块可按脚本方式直接导入
+"""
+import os
+import sys
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AgentCore", "Agents")
+if AGENTS_DIR not in sys.path:
+    sys.path.insert(0, AGENTS_DIR)
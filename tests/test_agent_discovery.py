@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试 agent_discovery 的意图分类、打分与工作流组装
+"""
+import unittest
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+try:
+    from agent_discovery import AgentDiscoveryService, AgentMatcher, IntentClassifier
+    A2A_AVAILABLE = True
+except ImportError:
+    A2A_AVAILABLE = False
+
+
+_INPUTS = [
+    "我想买一台笔记本电脑",
+    "帮我在亚马逊上搜索耳机",
+    "用支付宝付款",
+    "buy",
+    "pay",
+    "search for shoes on amazon",
+    "商家接单并交付",
+    "",
+    "hello there",
+    "I want to purchase a phone and pay with alipay",
+    "找一件商品",
+    "find me a merchant",
+]
+
+
+@unittest.skipUnless(A2A_AVAILABLE, "python_a2a 未安装")
+class IntentClassifierTest(unittest.TestCase):
+    """批量分类的结果必须与逐条分类一致"""
+    
+    def test_classify_many_matches_classify_intent(self):
+        expected = [IntentClassifier.classify_intent(text) for text in _INPUTS]
+        self.assertEqual(IntentClassifier.classify_many(_INPUTS), expected)
+    
+    def test_matches_do_not_cross_input_boundaries(self):
+        # 关键词被拆到相邻两个输入中时，拼接扫描不应命中
+        for pair in (["我", "要"], ["pa", "y"]):
+            self.assertEqual(IntentClassifier.classify_many(pair), [["general"], ["general"]])
+    
+    def test_empty_batch(self):
+        self.assertEqual(IntentClassifier.classify_many([]), [])
+
+
+@unittest.skipUnless(A2A_AVAILABLE, "python_a2a 未安装")
+class AgentMatcherTest(unittest.TestCase):
+    """描述匹配按完整单词计分"""
+    
+    AGENT = {"name": "Gateway", "description": "payment gateway for orders", "skills": []}
+    
+    def test_description_scores_whole_tokens_only(self):
+        # "pay" 只是 "payment" 的子串，不应计入描述匹配
+        self.assertEqual(AgentMatcher.calculate_agent_score(self.AGENT, ["general"], "pay now"), 0.0)
+        self.assertGreater(AgentMatcher.calculate_agent_score(self.AGENT, ["general"], "payment now"), 0.0)
+    
+    def test_rank_agents_does_not_expose_workflow_role(self):
+        ranked = AgentMatcher.rank_agents([self.AGENT], ["payment"], "payment")
+        self.assertEqual(len(ranked), 1)
+        self.assertNotIn("workflow_role", ranked[0])
+        self.assertNotIn("match_score", self.AGENT)
+    
+    def test_repeated_words_count_once(self):
+        once = AgentMatcher.calculate_agent_score(self.AGENT, ["general"], "payment")
+        twice = AgentMatcher.calculate_agent_score(self.AGENT, ["general"], "payment payment")
+        self.assertEqual(once, twice)
+
+
+@unittest.skipUnless(A2A_AVAILABLE, "python_a2a 未安装")
+class PurchaseWorkflowTest(unittest.TestCase):
+    """每个工作流角色取匹配度最高的第一个agent"""
+    
+    AGENTS = [
+        {"name": "Alipay Payment Agent", "description": "alipay payment", "url": "http://pay-1",
+         "skills": [{"name": "payment", "description": "pay with alipay"}]},
+        {"name": "Backup Payment Agent", "description": "payment", "url": "http://pay-2",
+         "skills": [{"name": "checkout", "description": "checkout"}]},
+        {"name": "User Coordinator", "description": "coordinates purchase", "url": "http://user",
+         "skills": [{"name": "purchase", "description": "buy products"}]},
+        {"name": "Amazon Shopping Agent", "description": "amazon shopping", "url": "http://amazon",
+         "skills": [{"name": "product_search", "description": "search amazon products"}]},
+    ]
+    
+    def setUp(self):
+        self.service = AgentDiscoveryService()
+        patcher = mock.patch.object(self.service, "_fetch_active_agents", return_value=self.AGENTS)
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_first_agent_per_role(self):
+        with mock.patch("builtins.print"):
+            result = self.service.get_purchase_workflow_agents("I want to buy on amazon and pay with alipay")
+        
+        self.assertTrue(result["success"])
+        workflow = result["workflow"]
+        self.assertEqual(workflow["payment_agent"]["url"], "http://pay-1")
+        self.assertEqual(workflow["user_agent"]["url"], "http://user")
+        self.assertEqual(workflow["amazon_agent"]["url"], "http://amazon")
+        self.assertIsNone(workflow["merchant_agent"])
+        self.assertEqual(result["execution_order"], ["user_agent", "payment_agent", "amazon_agent"])
+        for agent in result["all_agents"]:
+            self.assertNotIn("workflow_role", agent)
+    
+    def test_discovery_returns_copy_of_cached_result(self):
+        with mock.patch("builtins.print"):
+            first = self.service.discover_agents_for_request("buy headphones")
+            first["success"] = False
+            second = self.service.discover_agents_for_request("buy headphones")
+        
+        self.assertTrue(second["success"])
+        self.assertNotIn("workflow_role", second["matching_agents"][0])
+        self.fetch.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+测试 agent_registry 的健康检查与列表缓存
+"""
+import json
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+try:
+    from python_a2a import AgentCard, AgentSkill
+    from agent_registry import AgentRegistry
+    A2A_AVAILABLE = True
+except ImportError:
+    A2A_AVAILABLE = False
+
+
+@unittest.skipUnless(A2A_AVAILABLE, "python_a2a 未安装")
+class PingAgentsTest(unittest.TestCase):
+    """并发ping受超时限制，超时仍在执行的ping不会被重复提交"""
+    
+    URL = "http://localhost:5011"
+    
+    def setUp(self):
+        with mock.patch("builtins.print"):
+            self.registry = AgentRegistry(heartbeat_interval=0.3)
+        self.addCleanup(self.registry._ping_executor.shutdown, wait=False)
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_results_follow_input_order(self):
+        error = RuntimeError("boom")
+        outcomes = {"http://a": True, "http://b": False, "http://c": error}
+        
+        def ping(agent_url):
+            outcome = outcomes[agent_url]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        
+        with mock.patch.object(self.registry, "_ping_agent", side_effect=ping):
+            results = self.registry._ping_agents_concurrently(list(outcomes))
+        self.assertEqual(results, [True, False, error])
+    
+    def test_hung_ping_times_out_and_is_not_resubmitted(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+        
+        def ping(agent_url):
+            calls.append(agent_url)
+            release.wait(5)
+            return True
+        
+        with mock.patch.object(self.registry, "_ping_agent", side_effect=ping):
+            self.assertEqual(self.registry._ping_agents_concurrently([self.URL]), [False])
+            self.assertEqual(self.registry._ping_agents_concurrently([self.URL]), [False])
+        self.assertEqual(calls, [self.URL])
+    
+    def test_last_seen_is_wall_clock(self):
+        last_seen = self.registry.agents[self.URL].last_seen
+        self.assertIsInstance(last_seen, datetime)
+        self.assertLess(abs(datetime.now() - last_seen), timedelta(seconds=5))
+
+
+@unittest.skipUnless(A2A_AVAILABLE, "python_a2a 未安装")
+class CachedListingTest(unittest.TestCase):
+    """agents列表的JSON响应在agents变化前复用缓存"""
+    
+    def setUp(self):
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = AgentRegistry()
+        self.addCleanup(self.registry._ping_executor.shutdown, wait=False)
+    
+    @staticmethod
+    def _card(url):
+        return AgentCard(name="Test Agent", description="test agent", url=url,
+                         skills=[AgentSkill(name="test", description="test skill")])
+    
+    @staticmethod
+    def _urls(payload, key):
+        return [agent["url"] for agent in json.loads(payload)[key]]
+    
+    def test_listing_is_cached_until_registration(self):
+        first = self.registry.get_all_agents_json()
+        self.assertIs(self.registry.get_all_agents_json(), first)
+        
+        self.registry.register_agent(self._card("http://new"))
+        updated = self.registry.get_all_agents_json()
+        self.assertIn("http://new", self._urls(updated, "agents"))
+        self.assertIn("http://new", self._urls(self.registry.get_active_agents_json(), "active_agents"))
+    
+    def test_unregister_invalidates_listing(self):
+        self.registry.register_agent(self._card("http://new"))
+        self.assertIn("http://new", self._urls(self.registry.get_all_agents_json(), "agents"))
+        
+        self.registry.unregister_agent("http://new")
+        self.assertNotIn("http://new", self._urls(self.registry.get_all_agents_json(), "agents"))
+    
+    def test_listing_includes_heartbeat_fields(self):
+        self.registry.register_agent(self._card("http://new"))
+        agent = json.loads(self.registry.get_all_agents_json())["agents"][-1]
+        self.assertIn("last_heartbeat", agent)
+        self.assertIn("response_time", agent)
+    
+    def test_heartbeat_refreshes_cached_listing(self):
+        self.registry.register_agent(self._card("http://new"))
+        self.registry.get_active_agents_json()
+        
+        self.registry.update_heartbeat("http://new", 0.05)
+        agent = json.loads(self.registry.get_active_agents_json())["active_agents"][-1]
+        self.assertEqual(agent["url"], "http://new")
+        self.assertEqual(agent["response_time"], 0.05)
+    
+    def test_heartbeat_that_changes_status_invalidates_cache(self):
+        # 预注册的agent状态为unknown，首次心跳使其变为active
+        url = "http://localhost:5011"
+        self.assertNotIn(url, self._urls(self.registry.get_active_agents_json(), "active_agents"))
+        
+        self.registry.update_heartbeat(url, 0.05)
+        self.assertIn(url, self._urls(self.registry.get_active_agents_json(), "active_agents"))
+
+
+if __name__ == "__main__":
+    unittest.main()
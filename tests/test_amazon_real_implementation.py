@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+测试 amazon_real_implementation 的SP-API限流与请求调度
+"""
+import asyncio
+import logging
+import unittest
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+import amazon_real_implementation
+from amazon_real_implementation import AmazonSPClient, RealAmazonService, TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+    """令牌桶先放行突发量，之后按速率补充令牌"""
+    
+    def setUp(self):
+        self.now = 100.0
+        self.sleeps = []
+        real_sleep = asyncio.sleep
+        
+        async def fake_sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now += seconds
+            await real_sleep(0)
+        
+        patchers = (
+            mock.patch.object(amazon_real_implementation, "time", mock.Mock(monotonic=lambda: self.now)),
+            mock.patch.object(amazon_real_implementation.asyncio, "sleep", fake_sleep),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def _acquire(self, bucket, times):
+        async def run():
+            for _ in range(times):
+                await bucket.acquire()
+        asyncio.run(run())
+    
+    def test_burst_is_served_without_waiting(self):
+        self._acquire(TokenBucket(rate=2.0, burst=3), 3)
+        self.assertEqual(self.sleeps, [])
+    
+    def test_waits_for_refill_once_burst_is_spent(self):
+        self._acquire(TokenBucket(rate=2.0, burst=2), 3)
+        self.assertEqual(self.sleeps, [0.5])
+    
+    def test_refill_is_capped_at_burst(self):
+        bucket = TokenBucket(rate=2.0, burst=2)
+        self._acquire(bucket, 2)
+        self.now += 60
+        self._acquire(bucket, 3)
+        self.assertEqual(self.sleeps, [0.5])
+    
+    def test_try_acquire_never_waits(self):
+        bucket = TokenBucket(rate=0.5, burst=1)
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.now += 2
+        self.assertTrue(bucket.try_acquire())
+        self.assertEqual(self.sleeps, [])
+    
+    def test_rate_follows_rate_limit_header(self):
+        bucket = TokenBucket(rate=2.0, burst=2)
+        bucket.update_rate({'x-amzn-RateLimit-Limit': '5.0'})
+        self.assertEqual(bucket.rate, 5.0)
+        for headers in (None, {}, {'x-amzn-RateLimit-Limit': 'abc'}, {'x-amzn-RateLimit-Limit': '0'}):
+            bucket.update_rate(headers)
+        self.assertEqual(bucket.rate, 5.0)
+
+
+class HedgedCallTest(unittest.TestCase):
+    """首个请求超过滚动P95仍未返回时补发一次请求，取先成功者"""
+    
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        with mock.patch("builtins.print"):
+            self.service = RealAmazonService()
+    
+    def _hedged(self, func):
+        async def run():
+            return await self.service._hedged_call('getOrder', func, 'ORDER-1')
+        return asyncio.run(run())
+    
+    def test_hedge_wins_when_primary_stalls(self):
+        self.service._latencies['getOrder'].extend([0.01] * self.service.HEDGE_MIN_SAMPLES)
+        calls = []
+        
+        async def get_order(order_id):
+            calls.append(order_id)
+            if len(calls) == 1:
+                await asyncio.sleep(10)
+                return "primary"
+            return "hedge"
+        
+        self.assertEqual(self._hedged(get_order), "hedge")
+        self.assertEqual(calls, ['ORDER-1', 'ORDER-1'])
+    
+    def test_no_hedge_when_no_token_is_free(self):
+        # getPricing突发量为1，首个请求取走令牌后补发只能排队，直接跳过对冲
+        self.service._latencies['getPricing'].extend([0.01] * self.service.HEDGE_MIN_SAMPLES)
+        calls = []
+        
+        async def get_pricing(asins):
+            calls.append(asins)
+            await asyncio.sleep(0.05)
+            return "primary"
+        
+        async def run():
+            return await self.service._hedged_call('getPricing', get_pricing, ['A1'])
+        
+        with mock.patch.object(self.service, '_call', wraps=self.service._call) as call:
+            self.assertEqual(asyncio.run(run()), "primary")
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(calls, [['A1']])
+    
+    def test_no_hedge_without_enough_latency_samples(self):
+        calls = []
+        
+        async def get_order(order_id):
+            calls.append(order_id)
+            await asyncio.sleep(0.05)
+            return "primary"
+        
+        self.assertEqual(self._hedged(get_order), "primary")
+        self.assertEqual(calls, ['ORDER-1'])
+        self.assertEqual(len(self.service._latencies['getOrder']), 1)
+
+
+class PriceCoalescingTest(unittest.TestCase):
+    """同一轮事件循环内的单品价格查询合并为一次批量请求"""
+    
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        with mock.patch("builtins.print"):
+            self.service = RealAmazonService()
+        self.requests = []
+        
+        async def get_product_pricing_for_asins(marketplace_id, asins):
+            self.requests.append(list(asins))
+            return mock.Mock(headers=None, payload=[
+                {'ASIN': asin, 'Product': {'CompetitivePricing': {'CompetitivePrices': [
+                    {'Price': {'LandedPrice': {'Amount': str(10 + i)}}}
+                ]}}}
+                for i, asin in enumerate(asins)
+            ])
+        
+        self.service.products_api = mock.Mock(get_product_pricing_for_asins=get_product_pricing_for_asins)
+    
+    def test_concurrent_lookups_share_one_batch_request(self):
+        async def run():
+            return await asyncio.gather(*(self.service._get_price(asin) for asin in ('A1', 'A2', 'A1')))
+        
+        self.assertEqual(asyncio.run(run()), [10.0, 11.0, 10.0])
+        self.assertEqual(self.requests, [['A1', 'A2']])
+        self.assertEqual(self.service._pricing_cache.get('A2'), 11.0)
+
+
+class EventLoopRebindTest(unittest.TestCase):
+    """同一服务实例在多个事件循环中复用时，限流器与合并请求按事件循环重建"""
+    
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        with mock.patch("builtins.print"):
+            self.service = RealAmazonService()
+    
+    def test_contended_calls_work_in_a_second_event_loop(self):
+        async def get_order(order_id):
+            await asyncio.sleep(0)
+            return order_id
+        
+        async def run():
+            # 超过并发上限，信号量与令牌桶的锁都会发生等待
+            orders = [f"ORDER-{i}" for i in range(self.service.MAX_CONCURRENT_CALLS + 1)]
+            return await asyncio.gather(*(self.service._call('getOrder', get_order, order) for order in orders))
+        
+        first = asyncio.run(run())
+        sem = self.service._sem
+        self.assertEqual(asyncio.run(run()), first)
+        self.assertIsNot(self.service._sem, sem)
+    
+    def test_pending_lookups_from_a_closed_loop_are_dropped(self):
+        async def stale():
+            self.service._bind_loop()
+            self.service._inflight['A1'] = asyncio.get_running_loop().create_future()
+            self.service._pending_prices['A1'] = asyncio.get_running_loop().create_future()
+        
+        async def fresh():
+            self.service._bind_loop()
+            return dict(self.service._inflight), dict(self.service._pending_prices)
+        
+        asyncio.run(stale())
+        self.assertEqual(asyncio.run(fresh()), ({}, {}))
+
+
+class TokenLockTest(unittest.TestCase):
+    """换取令牌的锁与事件循环绑定，新的事件循环中重新创建"""
+    
+    def test_token_lock_is_rebound_per_event_loop(self):
+        client = AmazonSPClient("refresh-token-test", "client-id", "client-secret")
+        self.addCleanup(AmazonSPClient._token_locks.pop, "refresh-token-test", None)
+        
+        async def get_locks():
+            return client._get_token_lock(), client._get_token_lock()
+        
+        first, same = asyncio.run(get_locks())
+        second, _ = asyncio.run(get_locks())
+        self.assertIs(first, same)
+        self.assertIsNot(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+测试 arbitration_agent 的请求分发与案例管理
+"""
+import json
+import logging
+import unittest
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+try:
+    from python_a2a import AgentCard
+    import arbitration_agent
+    from arbitration_agent import ArbitrationAgent, ArbitrationStatus
+    A2A_AVAILABLE = True
+except ImportError:
+    A2A_AVAILABLE = False
+
+
+class _Task:
+    """最小化的 A2A 任务对象"""
+    
+    def __init__(self, text):
+        self.message = {"content": {"text": text}}
+        self.status = None
+        self.artifacts = None
+
+
+@unittest.skipUnless(A2A_AVAILABLE, "python_a2a 未安装")
+class ArbitrationAgentTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.agent = ArbitrationAgent(agent_card=AgentCard(name="Arbitration Agent", description="", url=""))
+        self.addCleanup(self.agent.shutdown)
+    
+    def _initiate(self, order_id):
+        return self.agent.initiate_arbitration({
+            "order_id": order_id,
+            "user_agent_url": "http://user",
+            "merchant_agent_url": "http://merchant",
+        })
+    
+    def _finish(self, case_id, status=None):
+        """将案例置为已终结状态"""
+        self.agent._set_status(self.agent.cases[case_id], status or ArbitrationStatus.EXECUTED)
+
+
+class CaseEvictionTest(ArbitrationAgentTestCase):
+    """案例数超过上限时，从最久未访问处开始只淘汰已终结的案例"""
+    
+    def test_eviction_keeps_open_cases(self):
+        self.agent.MAX_ACTIVE_CASES = 3
+        case_ids = [self._initiate(f"ORDER{i}")["case_id"] for i in range(3)]
+        # 第一个和第三个案例已终结，第二个仍待处理
+        self._finish(case_ids[0])
+        self._finish(case_ids[2])
+        
+        newest = self._initiate("ORDER3")["case_id"]
+        
+        self.assertEqual(list(self.agent.cases), [case_ids[1], case_ids[2], newest])
+        self.assertNotIn("ORDER0", self.agent._order_index)
+        self.assertNotIn(case_ids[0], self.agent._by_status[ArbitrationStatus.EXECUTED.value])
+        # 被淘汰订单可以重新发起仲裁
+        self.assertTrue(self._initiate("ORDER0")["success"])
+    
+    def test_eviction_skips_recently_accessed_cases(self):
+        self.agent.MAX_ACTIVE_CASES = 2
+        case_ids = [self._initiate(f"ORDER{i}")["case_id"] for i in range(2)]
+        for case_id in case_ids:
+            self._finish(case_id, ArbitrationStatus.ESCALATED)
+        # 访问第一个案例后，它成为最近访问的案例
+        self.agent._get_case(case_ids[0])
+        
+        newest = self._initiate("ORDER2")["case_id"]
+        
+        self.assertEqual(list(self.agent.cases), [case_ids[0], newest])
+    
+    def test_list_cases_by_status(self):
+        case_ids = [self._initiate(f"ORDER{i}")["case_id"] for i in range(3)]
+        self._finish(case_ids[1])
+        
+        self.assertEqual([case["case_id"] for case in self.agent.list_cases("executed")], [case_ids[1]])
+        self.assertEqual([case["case_id"] for case in self.agent.list_cases("pending")],
+                         [case_ids[0], case_ids[2]])
+    
+    def test_reads_do_not_reorder_listing(self):
+        case_ids = [self._initiate(f"ORDER{i}")["case_id"] for i in range(3)]
+        self._finish(case_ids[0])
+        for case_id in reversed(case_ids):
+            self.agent.get_case(case_id)
+        
+        self.assertEqual([case["case_id"] for case in self.agent.list_cases()], case_ids)
+    
+    def test_no_eviction_when_only_open_cases(self):
+        self.agent.MAX_ACTIVE_CASES = 2
+        for i in range(4):
+            self._initiate(f"ORDER{i}")
+        self.assertEqual(len(self.agent.cases), 4)
+
+
+class CaseIdTest(ArbitrationAgentTestCase):
+    """案例ID为 ARB_ 加纳秒时间戳的base36编码"""
+    
+    def test_case_id_format(self):
+        result = self._initiate("ORDER-FORMAT")
+        self.assertRegex(result["case_id"], r"^ARB_[0-9a-z]+$")
+        self.assertNotIn("ORDER", result["case_id"])
+    
+    def test_case_ids_are_unique_when_clock_repeats(self):
+        with mock.patch.object(arbitration_agent.time, "time_ns", return_value=1):
+            case_ids = [self._initiate(f"ORDER{i}")["case_id"] for i in range(3)]
+        self.assertEqual(len(set(case_ids)), 3)
+
+
+class RequestDispatchTest(ArbitrationAgentTestCase):
+    """JSON请求按 type 通过处理函数表分发"""
+    
+    def _send(self, payload):
+        task = _Task(payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False))
+        self.agent.handle_task(task)
+        text = task.artifacts[0]["parts"][0]["text"]
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+    
+    def test_dispatches_by_type(self):
+        created = self._send({"type": "initiate_arbitration", "order_id": "ORDER1",
+                              "user_agent_url": "http://user", "merchant_agent_url": "http://merchant"})
+        self.assertTrue(created["success"])
+        
+        processed = self._send({"type": "process_dispute", "case_id": created["case_id"]})
+        self.assertEqual(processed["case_id"], created["case_id"])
+    
+    def test_reports_missing_fields(self):
+        result = self._send({"type": "confirm_decision", "case_id": "ARB_x"})
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "缺少必需字段: case_id 或 party")
+    
+    def test_unknown_request_type(self):
+        self.assertEqual(self._send({"type": "bogus"}), "未知的请求类型: bogus")
+    
+    def test_plain_text_without_keywords_is_rejected(self):
+        self.assertIn("请提供有效的仲裁请求", self._send("hello"))
+
+
+class ShutdownTest(ArbitrationAgentTestCase):
+    """关闭服务器时停止通知线程池"""
+    
+    def test_shutdown_stops_notify_executor(self):
+        self.agent.shutdown()
+        with self.assertRaises(RuntimeError):
+            self.agent._notify_executor.submit(print)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+测试 blockchain_service 的 Merkle 树批量上链辅助函数与上链数据模型
+"""
+import dataclasses
+import hashlib
+import unittest
+
+from tests import _path  # noqa: F401
+
+try:
+    import blockchain_service
+    WEB3_AVAILABLE = True
+except ImportError:
+    WEB3_AVAILABLE = False
+
+
+@unittest.skipUnless(WEB3_AVAILABLE, "web3 未安装")
+class MerkleProofTest(unittest.TestCase):
+    """Merkle 根与证明的往返验证"""
+    
+    @staticmethod
+    def _leaves(n):
+        return [hashlib.sha256(f"order-{i}".encode()).digest() for i in range(n)]
+    
+    def test_every_leaf_proves_root(self):
+        for n in range(1, 10):
+            leaves = self._leaves(n)
+            levels = blockchain_service._merkle_levels(leaves)
+            root = levels[-1][0]
+            self.assertEqual(len(levels[-1]), 1)
+            for i, leaf in enumerate(leaves):
+                proof = blockchain_service._merkle_proof(levels, i)
+                self.assertEqual(blockchain_service._merkle_root_from_proof(leaf, proof), root,
+                                 f"叶子 {i}/{n} 的证明无法还原树根")
+    
+    def test_single_leaf_is_root(self):
+        leaf = self._leaves(1)[0]
+        levels = blockchain_service._merkle_levels([leaf])
+        self.assertEqual(levels[-1][0], leaf)
+        self.assertEqual(blockchain_service._merkle_proof(levels, 0), [])
+    
+    def test_tampered_leaf_does_not_prove_root(self):
+        leaves = self._leaves(5)
+        levels = blockchain_service._merkle_levels(leaves)
+        proof = blockchain_service._merkle_proof(levels, 2)
+        forged = hashlib.sha256(b"forged").digest()
+        self.assertNotEqual(blockchain_service._merkle_root_from_proof(forged, proof), levels[-1][0])
+    
+    def test_proof_of_other_leaf_is_rejected(self):
+        leaves = self._leaves(4)
+        levels = blockchain_service._merkle_levels(leaves)
+        proof = blockchain_service._merkle_proof(levels, 0)
+        self.assertNotEqual(blockchain_service._merkle_root_from_proof(leaves[3], proof), levels[-1][0])
+
+
+
+@unittest.skipUnless(WEB3_AVAILABLE, "web3 未安装")
+class OnChainTransactionDataTest(unittest.TestCase):
+    """序列化结果与哈希缓存不属于数据类字段，且不会被调用方的修改污染"""
+    
+    def setUp(self):
+        self.data = blockchain_service.OnChainTransactionData(
+            order_id="ORDER-1", user_address="0xuser", merchant_address="0xmerchant",
+            amount=9.5, currency="USD", payment_tx_hash="0xpay",
+            timestamp="2026-01-01T00:00:00", product_info={"product_id": "P1"}
+        )
+    
+    def test_cache_slots_are_not_fields(self):
+        names = [f.name for f in dataclasses.fields(self.data)]
+        self.assertFalse([name for name in names if name.startswith("_cached_")])
+        self.assertNotIn("_cached_json", dataclasses.asdict(self.data))
+    
+    def test_to_dict_returns_nested_copies(self):
+        digest = self.data.calculate_hash()
+        self.data.to_dict()["product_info"]["product_id"] = "P2"
+        self.assertEqual(self.data.product_info, {"product_id": "P1"})
+        self.assertEqual(self.data.calculate_hash(), digest)
+    
+    def test_reassigning_a_field_invalidates_hash(self):
+        digest = self.data.calculate_hash()
+        self.data.status = "delivered"
+        self.assertNotEqual(self.data.calculate_hash(), digest)
+        self.assertEqual(dataclasses.replace(self.data, status="paid").calculate_hash(), digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
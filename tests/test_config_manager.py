@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+测试 config_manager 的全局配置实例与服务URL
+"""
+import unittest
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+import config_manager
+
+
+class LazyConfigTest(unittest.TestCase):
+    """全局配置实例在首次访问时才构建，之后复用同一实例"""
+    
+    def setUp(self):
+        patcher = mock.patch.object(config_manager, "_config_singleton", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_config_is_built_once_on_first_access(self):
+        with mock.patch.object(config_manager, "ConfigManager") as factory:
+            factory.assert_not_called()
+            first = config_manager.config
+            second = config_manager.config
+        
+        factory.assert_called_once_with()
+        self.assertIs(first, second)
+        self.assertIs(config_manager.get_config(), first)
+        self.assertNotIn("config", vars(config_manager))
+    
+    def test_unknown_module_attribute_raises(self):
+        with self.assertRaises(AttributeError):
+            config_manager.no_such_attribute
+
+
+class ServiceUrlsTest(unittest.TestCase):
+    """服务URL在配置加载后缓存，每次返回可自由修改的副本"""
+    
+    def setUp(self):
+        self.manager = config_manager.ConfigManager()
+        self.registry_url = f"http://localhost:{self.manager.system_config.registry_port}"
+    
+    def test_service_urls_are_independent_copies(self):
+        first = self.manager.get_service_urls()
+        first["registry"] = "http://elsewhere"
+        second = self.manager.get_service_urls()
+        
+        self.assertIsInstance(second, dict)
+        self.assertIsNot(second, first)
+        self.assertEqual(second["registry"], self.registry_url)
+
+
+if __name__ == "__main__":
+    unittest.main()
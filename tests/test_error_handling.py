@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+测试 error_handling 的重试装饰器与熔断器
+"""
+import asyncio
+import logging
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+import error_handling
+from error_handling import (
+    CircuitBreaker, ErrorHandler, NetworkError, PaymentError, RetryConfig, retry_with_backoff
+)
+
+
+class RetryDelayTest(unittest.TestCase):
+    """退避延迟按指数增长并受max_delay限制，抖动在0.5~1倍之间"""
+    
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        patcher = mock.patch.object(error_handling.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @staticmethod
+    def _always_fails(config):
+        @retry_with_backoff(config=config)
+        def call():
+            raise NetworkError("连接失败")
+        return call
+    
+    def _delays(self):
+        return [c.args[0] for c in self.sleep.call_args_list]
+    
+    def test_delays_grow_exponentially_up_to_max_delay(self):
+        config = RetryConfig(max_attempts=5, base_delay=1.0, max_delay=5.0, exponential_base=2.0, jitter=False)
+        with self.assertRaises(NetworkError):
+            self._always_fails(config)()
+        self.assertEqual(self._delays(), [1.0, 2.0, 4.0, 5.0])
+    
+    def test_jitter_scales_delay_between_half_and_full(self):
+        config = RetryConfig(max_attempts=2, base_delay=2.0)
+        for sample, expected in ((0.0, 1.0), (1.0, 2.0)):
+            self.sleep.reset_mock()
+            with mock.patch.object(error_handling.random, "random", return_value=sample):
+                with self.assertRaises(NetworkError):
+                    self._always_fails(config)()
+            self.assertEqual(self._delays(), [expected])
+    
+    def test_async_wrapper_uses_same_delays(self):
+        calls = []
+        
+        @retry_with_backoff(config=RetryConfig(max_attempts=3, base_delay=0.5, jitter=False))
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise NetworkError("暂时不可用")
+            return "ok"
+        
+        with mock.patch.object(error_handling.asyncio, "sleep", new=mock.AsyncMock()) as asleep:
+            self.assertEqual(asyncio.run(flaky()), "ok")
+        self.assertEqual([c.args[0] for c in asleep.call_args_list], [0.5, 1.0])
+
+
+class RetryWithoutCategorizationTest(unittest.TestCase):
+    """重试只依赖 is_retryable，不再对每次失败做完整的错误分类"""
+    
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        patcher = mock.patch.object(error_handling.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(ErrorHandler, "categorize_error",
+                                    side_effect=AssertionError("重试路径不应调用 categorize_error"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_retries_until_success(self):
+        calls = []
+        
+        @retry_with_backoff(config=RetryConfig(max_attempts=3, jitter=False))
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise NetworkError("暂时不可用")
+            return "ok"
+        
+        self.assertEqual(flaky(), "ok")
+        self.assertEqual(len(calls), 3)
+    
+    def test_non_retryable_error_is_raised_immediately(self):
+        calls = []
+        
+        @retry_with_backoff(config=RetryConfig(max_attempts=3))
+        def rejected():
+            calls.append(1)
+            raise PaymentError("参数错误", "ACQ.INVALID_PARAMETER", retryable=False)
+        
+        with self.assertRaises(PaymentError):
+            rejected()
+        self.assertEqual(len(calls), 1)
+        self.sleep.assert_not_called()
+
+
+class IsRetryableTest(unittest.TestCase):
+    """可重试判断使用实例上的错误分类，可按实例调整"""
+    
+    def test_default_classification(self):
+        handler = ErrorHandler()
+        self.assertTrue(handler.is_retryable(ConnectionError()))
+        self.assertFalse(handler.is_retryable(ValueError()))
+    
+    def test_instance_overrides_are_honoured(self):
+        handler = ErrorHandler()
+        handler.retryable_errors = handler.retryable_errors | {"ValueError"}
+        handler.non_retryable_errors = handler.non_retryable_errors | {"ConnectionError"}
+        self.assertTrue(handler.is_retryable(ValueError()))
+        self.assertFalse(handler.is_retryable(ConnectionError()))
+        # 其他实例仍使用默认分类
+        self.assertFalse(ErrorHandler().is_retryable(ValueError()))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    """熔断器按单调时钟判断恢复时间"""
+    
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(error_handling, "time", mock.Mock(monotonic=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.calls = []
+        self.breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30, expected_exception=ValueError)
+        
+        def operation(fail):
+            self.calls.append(fail)
+            if fail:
+                raise ValueError("失败")
+            return "ok"
+        
+        self.operation = self.breaker(operation)
+    
+    def _trip(self):
+        for _ in range(self.breaker.failure_threshold):
+            with self.assertRaises(ValueError):
+                self.operation(True)
+        self.assertEqual(self.breaker.state, "OPEN")
+    
+    def test_open_breaker_rejects_calls_until_recovery_timeout(self):
+        self._trip()
+        
+        self.now += 30
+        with self.assertRaisesRegex(Exception, "Circuit breaker is OPEN"):
+            self.operation(False)
+        self.assertEqual(len(self.calls), 2)
+        # 对外的失败时间仍是墙上时钟时间
+        self.assertIsInstance(self.breaker.last_failure_time, datetime)
+        
+        self.now += 1
+        self.assertEqual(self.operation(False), "ok")
+        self.assertEqual(self.breaker.state, "CLOSED")
+        self.assertEqual(self.breaker.failure_count, 0)
+    
+    def test_failed_trial_call_reopens_breaker(self):
+        self._trip()
+        self.now += 31
+        with self.assertRaises(ValueError):
+            self.operation(True)
+        self.assertEqual(self.breaker.state, "OPEN")
+        with self.assertRaisesRegex(Exception, "Circuit breaker is OPEN"):
+            self.operation(False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+测试 time_utils 的时间戳格式化
+"""
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from tests import _path  # noqa: F401
+
+import time_utils
+
+
+class NowIsoTest(unittest.TestCase):
+    """now_iso 精确到秒，同一秒内复用已格式化的字符串"""
+    
+    def setUp(self):
+        self.now = 1700000000.25
+        patchers = (
+            mock.patch.object(time_utils, "_now_cache", (0, "")),
+            mock.patch.object(time_utils, "time", mock.Mock(time=lambda: self.now)),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_truncates_to_whole_seconds(self):
+        self.assertEqual(time_utils.now_iso(), datetime.fromtimestamp(1700000000).isoformat())
+    
+    def test_reuses_string_within_same_second(self):
+        first = time_utils.now_iso()
+        self.now += 0.5
+        self.assertIs(time_utils.now_iso(), first)
+    
+    def test_formats_again_in_next_second(self):
+        first = time_utils.now_iso()
+        self.now += 1
+        second = time_utils.now_iso()
+        self.assertNotEqual(second, first)
+        self.assertEqual(second, datetime.fromtimestamp(1700000001).isoformat())
+
+
+if __name__ == "__main__":
+    unittest.main()